@@ -0,0 +1,56 @@
+"""
+Micro-benchmark of JWT backends and of the verified tokens cache.
+
+Run from the repository root:
+    python -m api.benchmarks.jwt_backends [iterations]
+"""
+import sys
+import timeit
+
+from api.src.domain.auth import utils
+from api.src.infrastructure.settings import settings
+
+
+def main(iterations: int = 20000) -> None:
+    key, algorithm = settings.auth.jwt_key, settings.auth.jwt_algorithm
+    payload = {
+        "sub": "0b7e4f2c-6a47-4f59-a1e5-2a52f4d0c9b1",
+        "username": "username",
+        "role": "USER",
+        "active": True,
+        "epoch": 0,
+        "exp": 4102444800,
+        "iat": 1735689600,
+        "jti": "5f0c2c8e-3f7a-4a51-9b0e-8f6f5d2e1c3a",
+        "type": "access",
+    }
+
+    print(f"{'backend':<10}{'encode, us':>14}{'decode, us':>14}")
+    for name, backend_class in utils.JWT_BACKENDS.items():
+        try:
+            backend = backend_class()
+        except RuntimeError as exp:
+            print(f"{name:<10}{'skipped: ' + str(exp):>28}")
+            continue
+
+        token = backend.encode(dict(payload), key, algorithm)
+        encode_time = timeit.timeit(
+            lambda: backend.encode(dict(payload), key, algorithm), number=iterations,
+        )
+        decode_time = timeit.timeit(
+            lambda: backend.decode(token, key, algorithm), number=iterations,
+        )
+        print(
+            f"{name:<10}"
+            f"{encode_time / iterations * 1e6:>14.2f}"
+            f"{decode_time / iterations * 1e6:>14.2f}"
+        )
+
+    token, _ = utils.create_jwt(dict(payload), "access", 15)
+    utils.decode_token(token)
+    cached_time = timeit.timeit(lambda: utils.decode_token(token), number=iterations)
+    print(f"{'cached':<10}{'':>14}{cached_time / iterations * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,55 @@
+"""add: case-insensitive login and refresh_tokens indexes
+
+The lower(username) / lower(email) indexes are lookup indexes only, they are
+not unique: uniqueness rules of usernames and emails stay case-sensitive.
+
+If a CONCURRENTLY build fails, Postgres leaves an INVALID index behind, so
+every index is dropped (if it exists) before it is created and the migration
+can simply be retried.
+
+Revision ID: 4c8e7a2d19f3
+Revises: b2d64c1e9a57
+Create Date: 2026-10-17 11:40:07.284915+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8e7a2d19f3"
+down_revision: Union[str, None] = "b2d64c1e9a57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("ix_users_lower_username", "users", [sa.text("lower(username)")]),
+    ("ix_users_lower_email", "users", [sa.text("lower(email)")]),
+    ("ix_refresh_tokens_user_id_created_at", "refresh_tokens", ["user_id", "created_at", "jti"]),
+    ("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # INVALID индекс, оставшийся после неудачной попытки
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True,
+            )
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True,
+            )
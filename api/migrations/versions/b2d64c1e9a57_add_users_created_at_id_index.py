@@ -0,0 +1,30 @@
+"""add: users (created_at, id) index for keyset pagination
+
+Revision ID: b2d64c1e9a57
+Revises: 7631ced89b27
+Create Date: 2026-10-17 10:12:41.503218+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b2d64c1e9a57"
+down_revision: Union[str, None] = "7631ced89b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_created_at_id", "users", ["created_at", "id"], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_created_at_id", table_name="users")
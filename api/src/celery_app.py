@@ -1,5 +1,9 @@
+import asyncio
+
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
+from api.src.infrastructure.app import app as app_container
 from api.src.infrastructure.settings import settings
 
 app = Celery(
@@ -25,3 +29,13 @@ app.autodiscover_tasks(
         "api.src.domain.music",
     ]
 )
+
+
+@worker_process_shutdown.connect
+def shutdown_app_container(**kwargs) -> None:
+    # закрывает пулы соединений redis и postgres процесса worker
+    loop = asyncio.get_event_loop()
+    if loop.is_running():
+        loop.create_task(app_container.shutdown())
+        return
+    loop.run_until_complete(app_container.shutdown())
@@ -6,7 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 
 from api.src.domain.auth.schemas import TokenDTO
-from api.src.domain.auth.utils import decode_jwt, validate_token_type
+from api.src.domain.auth.utils import decode_token, validate_token_type
 from api.src.domain.auth.exceptions import HTTPExceptionInvalidToken
 from api.src.domain.users.schemas import UserDTO
 from api.src.infrastructure.app import app
@@ -22,11 +22,10 @@ async def get_current_token_payload(
     token: Annotated[str, Depends(oauth2_scheme)],
 ) -> TokenDTO:
     try:
-        payload: dict = decode_jwt(token)
+        return decode_token(token)
     except JWTError as exp:
         logger.warning(f"Authorization: Invalid token: {exp}")
         raise HTTPExceptionInvalidToken
-    return TokenDTO.model_validate(payload)
 
 
 async def get_current_refresh_token_payload(
@@ -41,31 +40,43 @@ async def get_current_refresh_token_payload(
         )
         raise HTTPExceptionInvalidToken
 
-    await app.auth_service.check_refresh_token_exist(jti=payload.jti)
+    await app.auth_service.check_refresh_token_exist(user_id=payload.sub, jti=payload.jti)
+    return payload
+
+
+async def get_current_access_token_payload(
+    payload: Annotated[TokenDTO, Depends(get_current_token_payload)],
+) -> TokenDTO:
+    if not validate_token_type(payload.type, settings.auth.access_token_name):
+        logger.warning(
+            f"Authorization: "
+            f"Invalid token type {payload.type}! "
+            f"Must be {settings.auth.access_token_name}! "
+            f"User: '{payload.sub}'"
+        )
+        raise HTTPExceptionInvalidToken
+    if payload.role is None or payload.active is None or payload.epoch is None:
+        # токен выпущен до появления claims, нужно обновить его по refresh
+        logger.warning(f"Authorization: Access token without claims! User: '{payload.sub}'")
+        raise HTTPExceptionInvalidToken
+
+    if not settings.auth.access_token_revocation_grace_mode:
+        await app.auth_service.check_token_epoch(user_id=payload.sub, epoch=payload.epoch)
     return payload
 
 
 def get_auth_dependency_from_token_type(token_type: str) -> callable:
+    # тип токена и его claims проверяются только в зависимостях payload,
+    # чтобы у всех эндпоинтов были одни правила
+    payload_dependency = {
+        settings.auth.access_token_name: get_current_access_token_payload,
+        settings.auth.refresh_token_name: get_current_refresh_token_payload,
+    }[token_type]
+
     async def get_current_auth_user_from_token(
-        payload: Annotated[TokenDTO, Depends(get_current_token_payload)],
+        payload: Annotated[TokenDTO, Depends(payload_dependency)],
     ) -> UserDTO:
-        # проверка типа чтобы нельзя было логинится по refresh и выпускать новые токены по access
-        if not validate_token_type(token_type=payload.type, target_type=token_type):
-            logger.warning(
-                f"Authorization: "
-                f"Invalid token type {payload.type}! "
-                f"Must be {token_type}! "
-                f"User: '{payload.sub}'"
-            )
-            raise HTTPExceptionInvalidToken
-        # если token - refresh проверяет есть ли он в активных токенах пользователя
-        if payload.type == settings.auth.refresh_token_name:
-            await app.auth_service.check_refresh_token_exist(
-                user_id=payload.sub,
-                jti=payload.jti,
-            )
-
-        return await app.user_service.get_by_id(user_id=payload.sub)
+        return await app.user_service.get_auth_user(user_id=payload.sub)
 
     return get_current_auth_user_from_token
 
@@ -1,6 +1,6 @@
 import uuid
 import datetime
-from sqlalchemy import VARCHAR, ForeignKey, DateTime
+from sqlalchemy import VARCHAR, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -9,6 +9,12 @@ from api.src.infrastructure.database.models import Base, int_pk
 
 class SQLAlchemyRefreshTokenModel(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # токены пользователя (list/delete by user_id, keyset по created_at, jti)
+        Index("ix_refresh_tokens_user_id_created_at", "user_id", "created_at", "jti"),
+        # удаление просроченных токенов
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
 
     jti: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), unique=True, nullable=False, primary_key=True)
     expires_at: Mapped[datetime.datetime] = mapped_column(
@@ -1,10 +1,13 @@
 import logging
+from typing import AsyncGenerator
 
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete
+from sqlalchemy import select, insert, update, delete, any_, bindparam, exists, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from api.src.infrastructure.database.repository import AbstractSQLAlchemyRepository
+from api.src.infrastructure.database.pagination import encode_cursor, keyset_after
 from api.src.infrastructure.database.exceptions import (
     EntityNotFound,
     ConstraintViolation,
@@ -54,6 +57,44 @@ class SQLAlchemyRefreshTokenRepository(AbstractSQLAlchemyRepository):
             RefreshTokenDTO.model_validate(token) for token in result.scalars().all()
         ]
 
+    async def list_page(
+        self, *filter_, cursor: str | None = None, limit: int = 100, **filter_by_,
+    ) -> tuple[list[RefreshTokenDTO], str | None]:
+        stmt = (
+            select(self._model)
+            .filter(*filter_)
+            .filter_by(**filter_by_)
+            .order_by(self._model.created_at, self._model.jti)
+            .limit(limit + 1)
+        )
+        if cursor:
+            stmt = stmt.filter(
+                keyset_after(self._model.created_at, self._model.jti, cursor)
+            )
+
+        result = await self._session.execute(stmt)
+        rows = result.scalars().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].jti)
+        return [RefreshTokenDTO.model_validate(row) for row in rows], next_cursor
+
+    async def stream_all(
+        self, *filter_, batch_size: int = 1000, **filter_by_,
+    ) -> AsyncGenerator[RefreshTokenDTO, None]:
+        stmt = (
+            select(self._model)
+            .filter(*filter_)
+            .filter_by(**filter_by_)
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self._session.stream_scalars(stmt)
+        async for token in result:
+            yield RefreshTokenDTO.model_validate(token)
+
     async def create(self, data: RefreshTokenDTO) -> RefreshTokenDTO:
         stmt = (
             insert(self._model)
@@ -69,11 +110,24 @@ class SQLAlchemyRefreshTokenRepository(AbstractSQLAlchemyRepository):
 
         return RefreshTokenDTO.model_validate(result.scalars().one())
 
-    async def update(self, _id: str, data: RefreshTokenDTO) -> RefreshTokenDTO:
-        user = await self._session.get(self._model, _id)
-        if not user:
-            raise EntityNotFound(f"Token {_id} not found!")
+    async def create_many(self, data: list[RefreshTokenDTO]) -> list[RefreshTokenDTO]:
+        """Add new tokens with one multi-row INSERT ... RETURNING."""
+        if not data:
+            return []
 
+        stmt = insert(self._model).returning(self._model, sort_by_parameter_order=True)
+        try:
+            result = await self._session.execute(
+                stmt, [token.model_dump(exclude_none=True) for token in data],
+            )
+            await self._session.flush()
+        except IntegrityError as exp:
+            logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
+            raise ConstraintViolation(f"Constraint violation: {str(exp)}")
+
+        return [RefreshTokenDTO.model_validate(token) for token in result.scalars().all()]
+
+    async def update(self, _id: str, data: RefreshTokenDTO) -> RefreshTokenDTO:
         stmt = (
             update(self._model)
             .where(self._model.jti == _id)
@@ -87,20 +141,40 @@ class SQLAlchemyRefreshTokenRepository(AbstractSQLAlchemyRepository):
             logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
             raise ConstraintViolation(f"Constraint violation: {str(exp)}")
 
-        return RefreshTokenDTO.model_validate(result.scalars().one())
+        token = result.scalars().one_or_none()
+        if not token:
+            raise EntityNotFound(f"Token {_id} not found!")
+        return RefreshTokenDTO.model_validate(token)
 
     async def delete(self, _id: int) -> None:
-        token = await self._session.get(self._model, _id)
-        if not token:
+        stmt = delete(self._model).where(self._model.jti == _id).returning(self._model.jti)
+        try:
+            result = await self._session.execute(stmt)
+            await self._session.flush()
+        except IntegrityError as exp:
+            logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
+            raise ConstraintViolation(f"Constraint violation: {str(exp)}")
+
+        if result.scalar_one_or_none() is None:
             raise EntityNotFound(f"Token {_id} not found!")
 
+    async def delete_many(self, ids: list[str]) -> int:
+        """Remove tokens by their jti. Returns the number of removed rows."""
+        if not ids:
+            return 0
+
+        stmt = delete(self._model).where(
+            self._model.jti == any_(bindparam("ids", ids, type_=ARRAY(self._model.jti.type)))
+        )
         try:
-            await self._session.delete(token)
+            result = await self._session.execute(stmt)
             await self._session.flush()
         except IntegrityError as exp:
             logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
             raise ConstraintViolation(f"Constraint violation: {str(exp)}")
 
+        return result.rowcount
+
     async def delete_by(self, *filter_, **filter_by_) -> None:
         try:
             del_stmt = delete(self._model).filter(*filter_).filter_by(**filter_by_)
@@ -109,3 +183,93 @@ class SQLAlchemyRefreshTokenRepository(AbstractSQLAlchemyRepository):
         except IntegrityError as exp:
             logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
             raise ConstraintViolation(f"Constraint violation: {str(exp)}")
+
+    async def delete_batch_by(self, *filter_, batch_size: int = 1000, **filter_by_) -> int:
+        """
+        Remove up to `batch_size` matching tokens, skipping rows locked by other
+        transactions. Returns the number of removed rows.
+        """
+        batch = (
+            select(self._model.jti)
+            .filter(*filter_)
+            .filter_by(**filter_by_)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            delete(self._model)
+            .where(self._model.jti.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            result = await self._session.execute(stmt)
+            await self._session.flush()
+        except IntegrityError as exp:
+            logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
+            raise ConstraintViolation(f"Constraint violation: {str(exp)}")
+
+        return result.rowcount
+
+    async def rotate(
+        self, data: RefreshTokenDTO, limit: int, old_id: str | None = None,
+    ) -> bool:
+        """
+        Saves the token, deletes ``old_id`` and the oldest tokens of the user
+        above ``limit`` in one statement.
+
+        Returns:
+            bool: False if ``old_id`` is given but does not exist (already rotated
+                  or revoked), nothing is changed then.
+        """
+        model = self._model
+        user_tokens = (
+            select(model.jti)
+            .where(model.user_id == data.user_id)
+            .order_by(model.created_at.desc(), model.jti.desc())
+            # сохраняемый токен занимает одно место из limit
+            .offset(limit - 1)
+        )
+        new_token = select(
+            literal(data.jti, model.jti.type),
+            literal(data.user_id, model.user_id.type),
+            literal(data.expires_at, model.expires_at.type),
+        )
+        if old_id is not None:
+            # старый токен удаляется тем же запросом, при конкурентной ротации
+            # второй DELETE ждет первый и не находит строку
+            deleted = (
+                delete(model)
+                .where(model.jti == old_id, model.user_id == data.user_id)
+                .returning(model.jti)
+                .cte("deleted")
+            )
+            new_token = new_token.where(exists(select(deleted.c.jti)))
+            user_tokens = user_tokens.where(model.jti != old_id)
+
+        inserted = (
+            insert(model)
+            .from_select(["jti", "user_id", "expires_at"], new_token)
+            .returning(model.jti)
+            .cte("inserted")
+        )
+        evicted = (
+            delete(model)
+            .where(
+                model.jti.in_(user_tokens.scalar_subquery()),
+                exists(select(inserted.c.jti)),
+            )
+            .returning(model.jti)
+            .cte("evicted")
+        )
+        stmt = select(
+            inserted.c.jti,
+            select(func.count()).select_from(evicted).scalar_subquery(),
+        )
+        try:
+            result = await self._session.execute(stmt)
+            await self._session.flush()
+        except IntegrityError as exp:
+            logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
+            raise ConstraintViolation(f"Constraint violation: {str(exp)}")
+
+        return result.first() is not None
@@ -3,7 +3,7 @@ import datetime
 from math import ceil
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from api.src.domain.auth.schemas import TokenInfoResponse, TokenDTO
@@ -11,16 +11,25 @@ from api.src.domain.auth.dependencies import (
     get_current_refresh_token_payload,
     get_current_auth_user_by_access,
 )
-from api.src.domain.auth.utils import decode_jwt, check_permissions
+from api.src.domain.auth.utils import check_permissions
+from api.src.domain.dependencies import request_unit_of_work
 from api.src.domain.users.schemas import UserDTO
-from api.src.domain.auth.exceptions import HTTPExceptionInactiveUser, HTTPExceptionNoPermission
+from api.src.domain.auth.exceptions import (
+    HTTPExceptionInvalidLoginCredentials,
+    HTTPExceptionNoPermission,
+)
 # from api.src.domain.auth.tasks import send_email
 
 from api.src.infrastructure.app import app
+from api.src.infrastructure.settings import settings
 
 logger = logging.getLogger("my_app")
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(
+    prefix="/auth",
+    tags=["Auth"],
+    dependencies=[Depends(request_unit_of_work)],
+)
 
 @router.post(
     "/login",
@@ -28,20 +37,44 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     response_model=TokenInfoResponse,
 )
 async def login(
+    request: Request,
     credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> dict[str, str]:
-    user = await app.auth_service.authenticate_user(
-        credentials.username, credentials.password
+    window = settings.auth.login_rate_limit_window_seconds
+    ip_limit = {
+        f"login:ip:{request.client.host if request.client else 'unknown'}": (
+            settings.auth.login_rate_limit_per_ip, window,
+        ),
+    }
+    # по логину считаются только неудачные попытки, иначе чужие попытки входа
+    # (или частые входы самого пользователя) блокировали бы аккаунт
+    login_limit = {
+        f"login:login:{credentials.username.lower()}": (
+            settings.auth.login_rate_limit_per_login, window,
+        ),
+    }
+    if settings.auth.login_rate_limit_enabled:
+        # до проверки пароля, чтобы перебор не расходовал bcrypt
+        await app.rate_limiter.hit(ip_limit, check_only=login_limit)
+
+    try:
+        user = await app.auth_service.authenticate_user(
+            credentials.username, credentials.password
+        )
+    except HTTPException as exp:
+        if exp is HTTPExceptionInvalidLoginCredentials and settings.auth.login_rate_limit_enabled:
+            await app.rate_limiter.record(login_limit)
+        raise
+
+    access_token, _ = await app.auth_service.issue_access_token(str(user.id))
+    refresh_token, refresh_token_claims = await app.auth_service.create_refresh_token(
+        str(user.id)
     )
 
-    access_token: str = await app.auth_service.create_access_token(str(user.id))
-    refresh_token: str = await app.auth_service.create_refresh_token(str(user.id))
-
-    refresh_token_decoded: dict = decode_jwt(refresh_token)
     await app.auth_service.save_refresh_token(
-        user_id=refresh_token_decoded["sub"],
-        jti=refresh_token_decoded["jti"],
-        exp_date_stamp=refresh_token_decoded["exp"],
+        user_id=refresh_token_claims.sub,
+        jti=refresh_token_claims.jti,
+        exp_date_stamp=refresh_token_claims.exp,
     )
 
     logger.info(f"Authorization: User '{user.id}' created a new pair of tokens.")
@@ -59,6 +92,7 @@ async def logout(
     payload: Annotated[TokenDTO, Depends(get_current_refresh_token_payload)],
 ) -> None:
     await app.auth_service.delete_refresh_token(
+        user_id=payload.sub,
         jti=payload.jti,
     )
     logger.info(f"Authentication: User '{payload.sub}' logged out!")
@@ -73,20 +107,18 @@ async def logout(
 async def refresh_token(
     payload: Annotated[TokenDTO, Depends(get_current_refresh_token_payload)],
 ) -> dict[str, str]:
-    if not await app.user_service.is_user_active(payload.sub):
-        raise HTTPExceptionInactiveUser
-
-    access_token: str = await app.auth_service.create_access_token(payload.sub)
+    # claims access токена берутся из актуальных данных пользователя (с primary)
+    access_token, _ = await app.auth_service.issue_access_token(payload.sub)
     # время инвалидации refresh остается прежним (пользователь должен будет снова залогинится через 30 дней)
     # с каждым refresh время может немного увеличиваться из-за ceil
-    refresh_token: str = await app.auth_service.create_refresh_token(
+    refresh_token, refresh_token_claims = await app.auth_service.create_refresh_token(
         sub=payload.sub,
         expires_in_min=ceil((payload.exp - datetime.datetime.now().timestamp()) / 60),
     )
-    await app.auth_service.delete_refresh_token(jti=payload.jti)
-    await app.auth_service.save_refresh_token(
+    await app.auth_service.rotate_refresh_token(
         user_id=payload.sub,
-        jti=decode_jwt(refresh_token)["jti"],
+        old_jti=payload.jti,
+        jti=refresh_token_claims.jti,
         exp_date_stamp=payload.exp,
     )
 
@@ -108,6 +140,8 @@ async def terminate_all_sessions(
     if not check_permissions(current_user, target_user):
         raise HTTPExceptionNoPermission
     await app.auth_service.delete_all_refresh_tokens_by_user_id(user_id)
+    await app.auth_service.revoke_access_tokens(user_id)
+    await app.user_service.invalidate_auth_user(user_id)
 
     logger.info(
         f"Removed all active refresh tokens:\n"
@@ -2,6 +2,8 @@ import datetime
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict
 
+from api.src.infrastructure.database.enums import Roles
+
 
 class RefreshTokenDTO(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -25,3 +27,14 @@ class TokenDTO(BaseModel):
     iat: int
     exp: int
     type: str
+    # только у access токенов
+    username: str | None = None
+    role: Roles | None = None
+    active: bool | None = None
+    epoch: int | None = None
+
+
+class RefreshTokensPurgeResult(BaseModel):
+    deleted: int
+    batches: int
+    duration_seconds: float
@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import datetime
+import time
 from uuid import uuid4, UUID
 from typing import Callable, AsyncContextManager
-from sqlalchemy import or_
+from sqlalchemy import or_, func
 
 from redis import Redis
 
@@ -13,14 +15,16 @@ from api.src.domain.auth.exceptions import (
     HTTPExceptionInactiveUser,
 )
 from api.src.domain.users.models import SQLAlchemyUserModel
-from api.src.domain.users.schemas import UserDataResponse
-from api.src.domain.auth.utils import verify_password_hash, create_jwt
+from api.src.domain.users.schemas import UserDataResponse, UserDTO
+from api.src.domain.auth.utils import create_jwt
 from api.src.infrastructure.dal.datasource import AbstractUnitDataSource
 from api.src.infrastructure.dal.uow import AbstractUnitOfWork
+from api.src.infrastructure.password_hasher import ProcessPoolPasswordHasher
 from api.src.infrastructure.settings import settings
 
-from .schemas import RefreshTokenDTO
+from .schemas import RefreshTokenDTO, RefreshTokensPurgeResult, TokenDTO
 from .models import SQLAlchemyRefreshTokenModel
+from .token_store import AbstractRefreshTokenStore
 
 
 logger = logging.getLogger("my_app")
@@ -31,54 +35,145 @@ class AuthService:
         self,
         unit_of_work: AbstractUnitOfWork[AbstractUnitDataSource],
         redis_client: Callable[..., AsyncContextManager[Redis]],
+        password_hasher: ProcessPoolPasswordHasher,
+        refresh_token_store: AbstractRefreshTokenStore,
     ):
         self.uow = unit_of_work
         self._redis_client = redis_client
+        self._password_hasher = password_hasher
+        self._refresh_token_store = refresh_token_store
 
     async def authenticate_user(self, login, password) -> UserDataResponse:
         async with self.uow.execute() as datasource:
-            user = await datasource.users.find_by(
+            users = await datasource.users.list_all(
                 or_(
-                    SQLAlchemyUserModel.username == login,
-                    SQLAlchemyUserModel.email == login,
-                )
+                    func.lower(SQLAlchemyUserModel.username) == func.lower(login),
+                    func.lower(SQLAlchemyUserModel.email) == func.lower(login),
+                ),
             )
+        # логины, отличающиеся только регистром, могут принадлежать разным
+        # пользователям: точное совпадение важнее, иначе логин неоднозначен
+        user = next(
+            (user for user in users if login in (user.username, user.email)),
+            users[0] if len(users) == 1 else None,
+        )
         if not user:
             logger.warning(f"Authentication: Invalid login! '{login}' does not exist!")
             raise HTTPExceptionInvalidLoginCredentials
-        if not verify_password_hash(password, user.password):
+        # соединение scope запроса не должно простаивать в транзакции, пока работает bcrypt
+        await self.uow.release()
+        is_valid, new_password_hash = await self._password_hasher.verify_and_update(
+            password, user.password,
+        )
+        if not is_valid:
             logger.warning(f"Authentication: Invalid password! | '{login}'")
             raise HTTPExceptionInvalidLoginCredentials
         if not user.is_active:
             logger.warning(f"Authentication: Inactive account! | '{login}'")
             raise HTTPExceptionInactiveUser
+        if new_password_hash is not None:
+            # хеш с устаревшим числом раундов bcrypt
+            async with self.uow.begin() as datasource:
+                await datasource.users.update(user.id, UserDTO(password=new_password_hash))
+            logger.info(f"Authentication: Password rehashed! | '{login}'")
         # if not user.is_email_verified:
         #     logger.warning(f"Authentication: Email is not verified! | '{login}'")
         #     raise HTTPExceptionInactiveUser
 
         return UserDataResponse.model_validate(user)
 
-    @staticmethod
     async def create_access_token(
-        sub: str,
+        self,
+        user: UserDTO | UserDataResponse,
         expires_in_min: int = settings.auth.access_token_expires_min,
         token_type: str = settings.auth.access_token_name,
-    ) -> str:
+        epoch: int | None = None,
+    ) -> tuple[str, TokenDTO]:
+        # role и active позволяют авторизовать запрос без загрузки пользователя,
+        # epoch - отозвать все выпущенные access токены пользователя
+        if epoch is None:
+            epoch = await self.get_token_epoch(str(user.id))
         payload = {
-            "sub": str(sub),
+            "sub": str(user.id),
+            "username": user.username,
+            "role": user.role.value,
+            "active": user.is_active,
+            "epoch": epoch,
         }
-        return create_jwt(payload, token_type, expires_in_min)
+        token, claims = create_jwt(payload, token_type, expires_in_min)
+        return token, TokenDTO.model_validate(claims)
+
+    async def issue_access_token(self, user_id: str) -> tuple[str, TokenDTO]:
+        """
+        Creates an access token with the current claims of the user.
+
+        The epoch is read before the user, and the user from the primary: a
+        change committed after the read bumps the epoch later and revokes the
+        token, so a token never combines a new epoch with old claims.
+
+        Raises:
+            HTTPException: If the user does not exist or is inactive.
+        """
+        epoch = await self.get_token_epoch(user_id)
+        async with self.uow.begin() as datasource:
+            user = await datasource.users.find_by_id(user_id)
+        if not user:
+            logger.warning(f"Authorization: User '{user_id}' does not exist!")
+            raise HTTPExceptionInvalidToken
+        if not user.is_active:
+            logger.warning(f"Authorization: Inactive user '{user_id}' requested a token!")
+            raise HTTPExceptionInactiveUser
+        return await self.create_access_token(user, epoch=epoch)
 
     @staticmethod
     async def create_refresh_token(
         sub: str,
         expires_in_min: int = settings.auth.refresh_token_expires_min,
         token_type: str = settings.auth.refresh_token_name,
-    ) -> str:
+    ) -> tuple[str, TokenDTO]:
         payload = {
             "sub": str(sub),
         }
-        return create_jwt(payload, token_type, expires_in_min)
+        token, claims = create_jwt(payload, token_type, expires_in_min)
+        return token, TokenDTO.model_validate(claims)
+
+    @staticmethod
+    def _token_epoch_key(user_id: str) -> str:
+        return f"auth:token_epoch:{user_id}"
+
+    async def get_token_epoch(self, user_id: str) -> int:
+        async with self._redis_client() as client:
+            epoch = await client.get(self._token_epoch_key(user_id))
+        return int(epoch) if epoch else 0
+
+    async def check_token_epoch(self, user_id: str, epoch: int) -> None:
+        if epoch < await self.get_token_epoch(user_id):
+            logger.warning(
+                f"Authorization: Access token of user '{user_id}' was revoked!"
+            )
+            raise HTTPExceptionInvalidToken
+
+    async def revoke_access_tokens(self, user_id: str) -> None:
+        """
+        Bumps the user token epoch, so all access tokens issued before are rejected.
+
+        The epoch is bumped once the current changes are committed, otherwise a
+        token issued in between would get the new epoch with the old claims.
+
+        The epoch is the revocation time in milliseconds rather than a counter:
+        once the key expires together with the last revoked token, a later
+        revocation still gets an epoch greater than any previously issued one.
+        """
+        await self.uow.after_commit(self._bump_token_epoch, user_id)
+
+    async def _bump_token_epoch(self, user_id: str) -> None:
+        async with self._redis_client() as client:
+            await client.set(
+                self._token_epoch_key(user_id),
+                time.time_ns() // 1_000_000,
+                ex=settings.auth.access_token_expires_min * 60 + 60,
+            )
+        logger.info(f"Authorization: Revoked access tokens of user '{user_id}'.")
 
     @staticmethod
     async def get_verification_link(email: str, code: str) -> str:
@@ -124,45 +219,79 @@ class AuthService:
             f"Email verification: Code confirmed, account activated. | '{email}'"
         )
 
-    async def check_refresh_token_exist(self, jti: str) -> None:
-        async with self.uow.execute() as datasource:
-            token = await datasource.refresh_tokens.find_by_id(jti)
-            if not token:
-                logger.warning(
-                    f"Authorization: "
-                    f"Refresh token is valid but not in user active tokens!\n"
-                    f"JTI: '{jti}'"
-                )
-                raise HTTPExceptionInvalidToken
+    async def check_refresh_token_exist(self, user_id: str, jti: str) -> None:
+        if not await self._refresh_token_store.exists(user_id=user_id, jti=jti):
+            logger.warning(
+                f"Authorization: "
+                f"Refresh token is valid but not in user active tokens!\n"
+                f"JTI: '{jti}'"
+            )
+            raise HTTPExceptionInvalidToken
 
     async def save_refresh_token(
         self, user_id: str, jti: str, exp_date_stamp: int, limit: int = 5,
     ):
-        # await self.delete_expired_refresh_tokens()
+        new_token = RefreshTokenDTO(
+            jti=UUID(jti),
+            user_id=UUID(user_id),
+            expires_at=datetime.datetime.fromtimestamp(exp_date_stamp, tz=datetime.UTC),
+        )
+        await self._refresh_token_store.add(new_token, limit=limit)
 
-        async with self.uow.begin() as datasource:
-            new_token = RefreshTokenDTO(
-                jti=UUID(jti),
-                user_id=UUID(user_id),
-                expires_at=datetime.datetime.fromtimestamp(exp_date_stamp),
+    async def rotate_refresh_token(
+        self, user_id: str, old_jti: str, jti: str, exp_date_stamp: int, limit: int = 5,
+    ) -> None:
+        new_token = RefreshTokenDTO(
+            jti=UUID(jti),
+            user_id=UUID(user_id),
+            expires_at=datetime.datetime.fromtimestamp(exp_date_stamp, tz=datetime.UTC),
+        )
+        if not await self._refresh_token_store.rotate(old_jti, new_token, limit=limit):
+            logger.warning(
+                f"Authorization: "
+                f"Refresh token was already rotated or revoked!\n"
+                f"JTI: '{old_jti}'"
             )
-            await datasource.refresh_tokens.create(new_token)
+            raise HTTPExceptionInvalidToken
 
-            user_tokens = await datasource.refresh_tokens.list_all(user_id=user_id)
-            if len(user_tokens) > limit:
-                await datasource.refresh_tokens.delete(user_tokens[0].id)
+    async def delete_refresh_token(self, user_id: str, jti: str) -> None:
+        await self._refresh_token_store.remove(user_id=user_id, jti=jti)
 
-    async def delete_refresh_token(self, jti: str) -> None:
-        async with self.uow.begin() as datasource:
-            await datasource.refresh_tokens.delete(jti)
+    async def delete_expired_refresh_tokens(
+        self,
+        batch_size: int = settings.auth.expired_tokens_purge_batch_size,
+        batch_pause_seconds: float = settings.auth.expired_tokens_purge_batch_pause_seconds,
+    ) -> RefreshTokensPurgeResult:
+        # каждая порция удаляется в своей короткой транзакции,
+        # чтобы не держать долгие блокировки и не раздувать WAL одним большим DELETE
+        started_at = time.perf_counter()
+        expired_before = datetime.datetime.now(datetime.UTC)
+        deleted, batches = 0, 0
 
-    async def delete_expired_refresh_tokens(self) -> None:
-        async with self.uow.begin() as datasource:
+        while True:
+            async with self.uow.begin() as datasource:
+                batch_deleted = await datasource.refresh_tokens.delete_batch_by(
+                    SQLAlchemyRefreshTokenModel.expires_at <= expired_before,
+                    batch_size=batch_size,
+                )
+            deleted += batch_deleted
+            batches += 1
 
-            await datasource.refresh_tokens.delete_by(
-                SQLAlchemyRefreshTokenModel.expires_at <= datetime.datetime.now(datetime.UTC)
-            )
+            if batch_deleted < batch_size:
+                break
+            if batch_pause_seconds:
+                await asyncio.sleep(batch_pause_seconds)
+
+        result = RefreshTokensPurgeResult(
+            deleted=deleted,
+            batches=batches,
+            duration_seconds=round(time.perf_counter() - started_at, 3),
+        )
+        logger.info(
+            f"Refresh tokens purge: deleted {result.deleted} expired tokens "
+            f"in {result.batches} batches, {result.duration_seconds}s."
+        )
+        return result
 
     async def delete_all_refresh_tokens_by_user_id(self, user_id: str) -> None:
-        async with self.uow.begin() as datasource:
-            await datasource.refresh_tokens.delete_by(user_id=user_id)
+        await self._refresh_token_store.remove_all(user_id=str(user_id))
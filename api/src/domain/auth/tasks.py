@@ -5,28 +5,70 @@ import smtplib
 from celery.schedules import crontab
 
 from api.src.celery_app import app
+from api.src.domain.auth.token_store import RedisRefreshTokenStore
 from api.src.infrastructure.app import app as app_container
 from api.src.infrastructure.settings import settings
 
 
 @app.on_after_finalize.connect
 def setup_periodic_tasks(sender, **kwargs):
-    # Executes every Sunday morning at 1:00 a.m. UTC
+    # By default executes every Sunday morning at 1:00 a.m. UTC
     sender.add_periodic_task(
-        crontab(hour=1, minute=0, day_of_week=0),
+        crontab.from_string(settings.auth.expired_tokens_purge_cron),
         delete_expired_tokens.s(),
         name="delete_expired_tokens",
     )
+    if (
+        settings.auth.refresh_token_store == "redis"
+        and settings.auth.refresh_tokens_write_behind_runner == "celery"
+    ):
+        interval = settings.auth.refresh_tokens_write_behind_interval_seconds
+        sender.add_periodic_task(
+            interval,
+            flush_refresh_tokens.s(),
+            name="flush_refresh_tokens",
+            # пропущенные запуски не копятся в очереди
+            expires=interval,
+        )
 
 
 @app.task
-def delete_expired_tokens():
+def delete_expired_tokens() -> dict | None:
     loop = asyncio.get_event_loop()
+    purge = app_container.auth_service.delete_expired_refresh_tokens()
     if loop.is_running():
         # в случае запуска внутри already running loop
-        loop.create_task(app_container.auth_service.delete_expired_refresh_tokens())
-    else:
-        loop.run_until_complete(app_container.auth_service.delete_expired_refresh_tokens())
+        loop.create_task(purge)
+        return None
+    return loop.run_until_complete(purge).model_dump()
+
+
+@app.task
+def flush_refresh_tokens() -> int | None:
+    # write-behind журнала refresh токенов из redis в postgres
+    token_store = app_container.refresh_token_store
+    if not isinstance(token_store, RedisRefreshTokenStore):
+        return 0
+    loop = asyncio.get_event_loop()
+    flush = token_store.flush()
+    if loop.is_running():
+        loop.create_task(flush)
+        return None
+    return loop.run_until_complete(flush)
+
+
+@app.task
+def restore_refresh_tokens() -> int | None:
+    # ручной запуск после потери данных redis
+    token_store = app_container.refresh_token_store
+    if not isinstance(token_store, RedisRefreshTokenStore):
+        return 0
+    loop = asyncio.get_event_loop()
+    restore = token_store.restore()
+    if loop.is_running():
+        loop.create_task(restore)
+        return None
+    return loop.run_until_complete(restore)
 
 
 @app.task
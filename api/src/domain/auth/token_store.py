@@ -0,0 +1,358 @@
+import asyncio
+import datetime
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from typing import AsyncContextManager, Callable
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+
+from api.src.infrastructure.dal.datasource import AbstractUnitDataSource
+from api.src.infrastructure.dal.uow import AbstractUnitOfWork
+from api.src.infrastructure.database.exceptions import ConstraintViolation, EntityNotFound
+
+from .models import SQLAlchemyRefreshTokenModel
+from .schemas import RefreshTokenDTO
+
+
+logger = logging.getLogger("my_app")
+
+
+class AbstractRefreshTokenStore(ABC):
+    """
+    Allowlist of active refresh tokens of users.
+    """
+
+    @abstractmethod
+    async def add(self, token: RefreshTokenDTO, limit: int) -> None:
+        """
+        Adds the token, removing the oldest tokens of the user above ``limit``.
+        """
+
+    @abstractmethod
+    async def rotate(self, old_jti: str, token: RefreshTokenDTO, limit: int) -> bool:
+        """
+        Atomically replaces ``old_jti`` of the token user with the new token.
+
+        Returns:
+            bool: False if ``old_jti`` is not active (e.g. already rotated by
+                  a concurrent refresh), nothing is changed then.
+        """
+
+    @abstractmethod
+    async def exists(self, user_id: str, jti: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def remove(self, user_id: str, jti: str) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_all(self, user_id: str) -> None:
+        pass
+
+
+class SQLAlchemyRefreshTokenStore(AbstractRefreshTokenStore):
+    """
+    Keeps refresh tokens only in the ``refresh_tokens`` table.
+    """
+
+    def __init__(self, unit_of_work: AbstractUnitOfWork[AbstractUnitDataSource]) -> None:
+        self.uow = unit_of_work
+
+    async def add(self, token: RefreshTokenDTO, limit: int) -> None:
+        async with self.uow.begin() as datasource:
+            await datasource.refresh_tokens.rotate(token, limit=limit)
+
+    async def rotate(self, old_jti: str, token: RefreshTokenDTO, limit: int) -> bool:
+        async with self.uow.begin() as datasource:
+            return await datasource.refresh_tokens.rotate(token, limit=limit, old_id=old_jti)
+
+    async def exists(self, user_id: str, jti: str) -> bool:
+        async with self.uow.execute() as datasource:
+            token = await datasource.refresh_tokens.find_by_id(jti)
+        return token is not None
+
+    async def remove(self, user_id: str, jti: str) -> None:
+        async with self.uow.begin() as datasource:
+            try:
+                await datasource.refresh_tokens.delete(jti)
+            except EntityNotFound:
+                pass
+
+    async def remove_all(self, user_id: str) -> None:
+        async with self.uow.begin() as datasource:
+            await datasource.refresh_tokens.delete_by(user_id=user_id)
+
+
+class RedisRefreshTokenStore(AbstractRefreshTokenStore):
+    """
+    Keeps refresh tokens of every user in a Redis sorted set scored by expiration
+    time, the key itself expires together with the last token of the user.
+
+    Redis is authoritative for checks. Every change is also appended to a journal
+    list in the same atomic operation, and `flush()` persists the journal to the
+    ``refresh_tokens`` table in batches (write-behind), so that the tokens can be
+    restored with `restore()` after Redis data loss.
+    """
+
+    TOKENS_KEY = "auth:refresh_tokens:{user_id}"
+    JOURNAL_KEY = "auth:refresh_tokens:journal"
+    JOURNAL_LOCK_KEY = "auth:refresh_tokens:journal:lock"
+    JOURNAL_LOCK_TIMEOUT_SECONDS = 60
+
+    # KEYS: токены пользователя, журнал
+    # ARGV: jti, expires_at, now, limit, user_id[, old_jti]
+    _ADD_TOKEN_LUA = """
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+        local excess = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[4]) + 1
+        local evicted = {}
+        if excess > 0 then
+            evicted = redis.call('ZRANGE', KEYS[1], 0, excess - 1)
+            redis.call('ZREMRANGEBYRANK', KEYS[1], 0, excess - 1)
+        end
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+        local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+        redis.call('EXPIREAT', KEYS[1], math.ceil(tonumber(last[2])))
+
+        redis.call('RPUSH', KEYS[2], cjson.encode(
+            {op='add', jti=ARGV[1], user_id=ARGV[5], expires_at=tonumber(ARGV[2])}
+        ))
+        for _, jti in ipairs(evicted) do
+            redis.call('RPUSH', KEYS[2], cjson.encode({op='remove', jti=jti}))
+        end
+        return 1
+    """
+    ADD_SCRIPT = _ADD_TOKEN_LUA
+    ROTATE_SCRIPT = """
+        if redis.call('ZREM', KEYS[1], ARGV[6]) == 0 then
+            return 0
+        end
+        redis.call('RPUSH', KEYS[2], cjson.encode({op='remove', jti=ARGV[6]}))
+    """ + _ADD_TOKEN_LUA
+
+    # KEYS: журнал, блокировка журнала
+    # ARGV: число сохраненных записей, токен блокировки, timeout блокировки в ms
+    TRIM_JOURNAL_SCRIPT = """
+        if redis.call('GET', KEYS[2]) ~= ARGV[2] then
+            return 0
+        end
+        redis.call('LTRIM', KEYS[1], ARGV[1], -1)
+        redis.call('PEXPIRE', KEYS[2], ARGV[3])
+        return 1
+    """
+
+    def __init__(
+        self,
+        redis_client: Callable[..., AsyncContextManager[Redis]],
+        unit_of_work: AbstractUnitOfWork[AbstractUnitDataSource],
+        flush_batch_size: int = 500,
+    ) -> None:
+        self._redis_client = redis_client
+        self.uow = unit_of_work
+        self._flush_batch_size = flush_batch_size
+
+    def _tokens_key(self, user_id: str) -> str:
+        return self.TOKENS_KEY.format(user_id=user_id)
+
+    async def add(self, token: RefreshTokenDTO, limit: int) -> None:
+        await self._run_script(self.ADD_SCRIPT, token, limit)
+
+    async def rotate(self, old_jti: str, token: RefreshTokenDTO, limit: int) -> bool:
+        return bool(await self._run_script(self.ROTATE_SCRIPT, token, limit, old_jti))
+
+    async def _run_script(
+        self, script: str, token: RefreshTokenDTO, limit: int, *args: str,
+    ) -> int:
+        async with self._redis_client() as client:
+            run = client.register_script(script)
+            return await run(
+                keys=[self._tokens_key(str(token.user_id)), self.JOURNAL_KEY],
+                args=[
+                    str(token.jti),
+                    token.expires_at.timestamp(),
+                    time.time(),
+                    limit,
+                    str(token.user_id),
+                    *args,
+                ],
+            )
+
+    async def exists(self, user_id: str, jti: str) -> bool:
+        async with self._redis_client() as client:
+            expires_at = await client.zscore(self._tokens_key(user_id), jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def remove(self, user_id: str, jti: str) -> None:
+        async with self._redis_client() as client:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.zrem(self._tokens_key(user_id), jti)
+                pipe.rpush(self.JOURNAL_KEY, json.dumps({"op": "remove", "jti": jti}))
+                await pipe.execute()
+
+    async def remove_all(self, user_id: str) -> None:
+        async with self._redis_client() as client:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._tokens_key(user_id))
+                pipe.rpush(
+                    self.JOURNAL_KEY, json.dumps({"op": "remove_user", "user_id": user_id}),
+                )
+                await pipe.execute()
+
+    async def flush(self) -> int:
+        """
+        Persists journaled changes to the database.
+
+        Batches are removed from the journal only after their transaction is
+        committed, so a failed flush is retried by the next one. Only one process
+        flushes at a time to keep the order of changes: a batch is trimmed only
+        while the lock is still held, which also extends the lock for the next
+        batch. If the lock expired, another process may have taken over the
+        same entries, and the flush stops without trimming.
+
+        Returns:
+            int: Number of persisted journal entries.
+        """
+        flushed = 0
+        async with self._redis_client() as client:
+            lock = client.lock(self.JOURNAL_LOCK_KEY, timeout=self.JOURNAL_LOCK_TIMEOUT_SECONDS)
+            if not await lock.acquire(blocking=False):
+                return flushed
+            trim = client.register_script(self.TRIM_JOURNAL_SCRIPT)
+            try:
+                while True:
+                    entries = await client.lrange(
+                        self.JOURNAL_KEY, 0, self._flush_batch_size - 1,
+                    )
+                    if not entries:
+                        break
+
+                    await self._persist([json.loads(entry) for entry in entries])
+                    is_trimmed = await trim(
+                        keys=[self.JOURNAL_KEY, self.JOURNAL_LOCK_KEY],
+                        args=[
+                            len(entries),
+                            lock.local.token,
+                            self.JOURNAL_LOCK_TIMEOUT_SECONDS * 1000,
+                        ],
+                    )
+                    if not is_trimmed:
+                        # записи уже могли быть сохранены и удалены другим процессом,
+                        # повторное сохранение безопасно, удаление - нет
+                        logger.warning("Refresh tokens: Journal lock expired during flush!")
+                        return flushed
+                    flushed += len(entries)
+
+                    if len(entries) < self._flush_batch_size:
+                        break
+            finally:
+                with suppress(LockError):
+                    await lock.release()
+        return flushed
+
+    async def _persist(self, entries: list[dict]) -> None:
+        added: dict[str, RefreshTokenDTO] = {}
+        removed: set[str] = set()
+        removed_users: set[str] = set()
+
+        for entry in entries:
+            if entry["op"] == "add":
+                added[entry["jti"]] = RefreshTokenDTO(
+                    jti=UUID(entry["jti"]),
+                    user_id=UUID(entry["user_id"]),
+                    expires_at=datetime.datetime.fromtimestamp(
+                        entry["expires_at"], tz=datetime.UTC,
+                    ),
+                )
+            elif entry["op"] == "remove":
+                added.pop(entry["jti"], None)
+                removed.add(entry["jti"])
+            elif entry["op"] == "remove_user":
+                added = {
+                    jti: token for jti, token in added.items()
+                    if str(token.user_id) != entry["user_id"]
+                }
+                removed_users.add(entry["user_id"])
+
+        try:
+            async with self.uow.begin() as datasource:
+                await self._delete(datasource, removed, removed_users)
+                await datasource.refresh_tokens.create_many(list(added.values()))
+            return
+        except ConstraintViolation:
+            # повтор журнала после сбоя или токен уже удаленного пользователя
+            logger.warning("Refresh tokens: Batch insert failed, persisting one by one.")
+
+        async with self.uow.begin() as datasource:
+            await self._delete(datasource, removed, removed_users)
+        for token in added.values():
+            try:
+                async with self.uow.begin() as datasource:
+                    await datasource.refresh_tokens.create(token)
+            except ConstraintViolation:
+                logger.warning(f"Refresh tokens: Skipped token '{token.jti}'.")
+
+    @staticmethod
+    async def _delete(
+        datasource: AbstractUnitDataSource, removed: set[str], removed_users: set[str],
+    ) -> None:
+        if removed_users:
+            await datasource.refresh_tokens.delete_by(
+                SQLAlchemyRefreshTokenModel.user_id.in_(
+                    [UUID(user_id) for user_id in removed_users]
+                )
+            )
+        await datasource.refresh_tokens.delete_many([UUID(jti) for jti in removed])
+
+    async def run_write_behind(self, interval_seconds: float) -> None:
+        """
+        Flushes the journal every ``interval_seconds`` until cancelled.
+        """
+        while True:
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exp:
+                logger.error(f"Refresh tokens: Write-behind flush failed: {exp}")
+            await asyncio.sleep(interval_seconds)
+
+    async def restore(self) -> int:
+        """
+        Rebuilds the Redis allowlist from the database, e.g. after Redis data loss.
+
+        Returns:
+            int: Number of restored tokens.
+        """
+        await self.flush()
+
+        restored = 0
+        now = datetime.datetime.now(datetime.UTC)
+        # ключ истекает вместе с последним токеном пользователя
+        # (EXPIREAT GT не срабатывает на ключах без TTL)
+        expires_at: dict[str, datetime.datetime] = {}
+        async with self.uow.execute() as datasource, self._redis_client() as client:
+            async with client.pipeline(transaction=False) as pipe:
+                async for token in datasource.refresh_tokens.stream_all(
+                    SQLAlchemyRefreshTokenModel.expires_at > now,
+                    batch_size=self._flush_batch_size,
+                ):
+                    key = self._tokens_key(str(token.user_id))
+                    pipe.zadd(key, {str(token.jti): token.expires_at.timestamp()})
+                    expires_at[key] = max(expires_at.get(key, token.expires_at), token.expires_at)
+                    restored += 1
+                    if restored % self._flush_batch_size == 0:
+                        await pipe.execute()
+
+                for index, (key, key_expires_at) in enumerate(expires_at.items(), 1):
+                    pipe.expireat(key, key_expires_at)
+                    if index % self._flush_batch_size == 0:
+                        await pipe.execute()
+                await pipe.execute()
+
+        logger.info(f"Refresh tokens: Restored {restored} tokens to Redis.")
+        return restored
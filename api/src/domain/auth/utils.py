@@ -1,35 +1,279 @@
+import base64
+import hashlib
+import hmac
+import json
 import logging
+import math
+import time
+import timeit
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta, timezone
+from functools import cache
 from uuid import uuid4
 
-from jose import jwt
+from jose import jwt as jose_jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
 from passlib.context import CryptContext
 
+from api.src.domain.auth.schemas import TokenDTO
 from api.src.domain.users.schemas import UserDTO
+from api.src.infrastructure.cache import LRUTTLCache
 from api.src.infrastructure.database.enums import Roles
 from api.src.infrastructure.settings import settings
 
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger("my_app")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+@cache
+def get_pwd_context(rounds: int | None = None, max_rounds: int | None = None) -> CryptContext:
+    """
+    Returns a bcrypt context hashing with ``rounds``, in which hashes with fewer
+    than ``rounds`` or more than ``max_rounds`` rounds need an update.
+    """
+    if rounds is None:
+        return pwd_context
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_desired_rounds=rounds,
+        bcrypt__max_desired_rounds=max(rounds, max_rounds or rounds),
+    )
+
+
+def get_password_hash(password: str, rounds: int | None = None) -> str:
+    return get_pwd_context(rounds).hash(password)
 
 
 def verify_password_hash(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
+def verify_and_update_password_hash(
+    password: str,
+    hashed_password: str,
+    rounds: int | None = None,
+    max_rounds: int | None = None,
+) -> tuple[bool, str | None]:
+    """
+    Verifies the password and rehashes it if the hash rounds are outdated.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password is valid and
+                                 the new hash if it needs to be saved.
+    """
+    return get_pwd_context(rounds, max_rounds).verify_and_update(password, hashed_password)
+
+
+def calibrate_password_hash_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int,
+) -> tuple[int, float]:
+    """
+    Picks bcrypt rounds whose hashing time on this host is closest to ``target_ms``.
+    Each round doubles the hashing time, so it is measured once for ``min_rounds``.
+
+    Returns:
+        tuple[int, float]: Rounds and expected hashing time in milliseconds.
+    """
+    context = get_pwd_context(min_rounds)
+    context.hash("calibration")  # прогрев backend
+    measured_ms = min(
+        timeit.timeit(lambda: context.hash("calibration"), number=1) * 1000
+        for _ in range(3)
+    )
+    rounds = min_rounds + round(math.log2(target_ms / measured_ms))
+    rounds = min(max(rounds, min_rounds), max_rounds)
+    return rounds, measured_ms * 2 ** (rounds - min_rounds)
+
+
+class JWTBackend(ABC):
+    """
+    Signs and verifies JWTs. Every backend raises ``jose.JWTError``
+    (or its subclasses) for invalid tokens.
+    """
+
+    name: str
+
+    @abstractmethod
+    def encode(self, payload: dict, key: str, algorithm: str) -> str:
+        pass
+
+    @abstractmethod
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        pass
+
+    def check_algorithm(self, algorithm: str) -> None:
+        """
+        Raises ValueError if the backend can't sign with ``algorithm``.
+        """
+
+
+class JoseJWTBackend(JWTBackend):
+    name = "jose"
+
+    def encode(self, payload: dict, key: str, algorithm: str) -> str:
+        return jose_jwt.encode(payload, key=key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        return jose_jwt.decode(token, key=key, algorithms=[algorithm])
+
+
+class PyJWTBackend(JWTBackend):
+    name = "pyjwt"
+
+    def __init__(self) -> None:
+        if pyjwt is None:
+            raise RuntimeError("PyJWT is not installed!")
+
+    def encode(self, payload: dict, key: str, algorithm: str) -> str:
+        return pyjwt.encode(payload, key=key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        try:
+            return pyjwt.decode(token, key=key, algorithms=[algorithm])
+        except pyjwt.ExpiredSignatureError as exp:
+            raise ExpiredSignatureError(str(exp))
+        except pyjwt.PyJWTError as exp:
+            raise JWTError(str(exp))
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _json_dumps(data: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def _json_loads(data: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class HS256JWTBackend(JWTBackend):
+    """
+    Minimal HS256-only implementation on top of ``hmac`` without
+    the generic JWS machinery, validates ``exp`` like python-jose.
+    """
+
+    name = "hs256"
+    _header = _b64encode(_json_dumps({"alg": "HS256", "typ": "JWT"}))
+
+    def encode(self, payload: dict, key: str, algorithm: str) -> str:
+        self.check_algorithm(algorithm)
+        signing_input = self._header + b"." + _b64encode(_json_dumps(payload))
+        signature = hmac.new(key.encode(), signing_input, hashlib.sha256).digest()
+        return (signing_input + b"." + _b64encode(signature)).decode()
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        try:
+            self.check_algorithm(algorithm)
+            signing_input, _, signature = token.encode().rpartition(b".")
+            header, _, payload = signing_input.partition(b".")
+            if _json_loads(_b64decode(header)).get("alg") != "HS256":
+                raise JWTError("The specified alg value is not allowed")
+
+            expected = hmac.new(key.encode(), signing_input, hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise JWTError("Signature verification failed.")
+            claims = _json_loads(_b64decode(payload))
+        except JWTError:
+            raise
+        except (ValueError, TypeError, AttributeError) as exp:
+            raise JWTError(f"Invalid token: {exp}")
+
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload string: must be a json object")
+        if "exp" in claims:
+            # как python-jose: любое число (или числовая строка) приводится к int
+            try:
+                if isinstance(claims["exp"], bool):
+                    raise ValueError
+                exp = int(claims["exp"])
+            except (ValueError, TypeError):
+                raise JWTClaimsError("Expiration Time claim (exp) must be an integer.")
+            if exp < int(time.time()):
+                raise ExpiredSignatureError("Signature has expired.")
+        return claims
+
+    def check_algorithm(self, algorithm: str) -> None:
+        if algorithm != "HS256":
+            raise ValueError(f"{algorithm} is not supported by the hs256 JWT backend!")
+
+
+JWT_BACKENDS: dict[str, type[JWTBackend]] = {
+    backend.name: backend for backend in (JoseJWTBackend, PyJWTBackend, HS256JWTBackend)
+}
+
+
+def get_jwt_backend(name: str | None = None) -> JWTBackend:
+    # настройка читается при вызове, а не при импорте модуля
+    return _get_jwt_backend(name or settings.auth.jwt_backend)
+
+
+@cache
+def _get_jwt_backend(name: str) -> JWTBackend:
+    return JWT_BACKENDS[name]()
+
+
+def check_jwt_settings() -> None:
+    """
+    Checks at startup that the configured backend supports the configured
+    algorithm, instead of failing on every token.
+    """
+    get_jwt_backend().check_algorithm(settings.auth.jwt_algorithm)
+
+
+# проверенные токены: token -> TokenDTO до истечения срока токена
+_verified_tokens = LRUTTLCache(max_size=settings.auth.jwt_decode_cache_size)
+
+
 def decode_jwt(token: str) -> dict:
-    return jwt.decode(
-        token, key=settings.auth.jwt_key, algorithms=[settings.auth.jwt_algorithm],
+    return get_jwt_backend().decode(
+        token, key=settings.auth.jwt_key, algorithm=settings.auth.jwt_algorithm,
     )
 
 
-def create_jwt(payload: dict, token_type: str, expires_minutes: int) -> str:
+def decode_token(token: str) -> TokenDTO:
+    """
+    Verifies the token and returns its claims, tokens verified before
+    are taken from an in-process LRU until they expire. Callers get their
+    own copy of the claims, so changing it does not affect the cache.
+    """
+    payload = _verified_tokens.get(token)
+    if payload is not None:
+        return payload.model_copy()
+
+    payload = TokenDTO.model_validate(decode_jwt(token))
+    if settings.auth.jwt_decode_cache_size:
+        _verified_tokens.set(token, payload.model_copy(), ttl_seconds=payload.exp - time.time())
+    return payload
+
+
+def create_jwt(payload: dict, token_type: str, expires_minutes: int) -> tuple[str, dict]:
+    """
+    Returns the signed token together with its claims.
+    """
     time_now = datetime.now(tz=timezone.utc)
     expiration_time = time_now + timedelta(minutes=expires_minutes)
 
@@ -42,9 +286,10 @@ def create_jwt(payload: dict, token_type: str, expires_minutes: int) -> str:
         }
     )
 
-    return jwt.encode(
+    token = get_jwt_backend().encode(
         payload, key=settings.auth.jwt_key, algorithm=settings.auth.jwt_algorithm,
     )
+    return token, payload
 
 
 def validate_token_type(token_type: str, target_type: str) -> bool:
@@ -1,26 +1,55 @@
-from typing import Annotated
+from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends
 
-from api.src.domain.auth.dependencies import get_current_auth_user_by_access, logger
+from api.src.domain.auth.dependencies import get_current_access_token_payload, logger
 from api.src.domain.auth.exceptions import (
     HTTPExceptionInactiveUser,
     HTTPExceptionNoPermission,
 )
+from api.src.domain.auth.schemas import TokenDTO
 from api.src.domain.users.schemas import UserDTO
+from api.src.infrastructure.app import app
+from api.src.infrastructure.dal.datasource import AbstractUnitDataSource
 from api.src.infrastructure.database.enums import Roles
 
 
+async def request_unit_of_work() -> AsyncGenerator[AbstractUnitDataSource, None]:
+    """
+    Opens a unit of work scope for the whole request: every service call made while
+    handling it shares one session, one connection and one transaction.
+
+    The connection is checked out on the first query. Endpoints that hash
+    passwords hash before it, or call `release()` of the unit of work first,
+    so the connection doesn't stay idle in a transaction while hashing.
+    """
+    async with app.unit_of_work.scope() as datasource:
+        yield datasource
+
+
 async def get_current_active_user(
-    user: Annotated[UserDTO, Depends(get_current_auth_user_by_access)],
+    payload: Annotated[TokenDTO, Depends(get_current_access_token_payload)],
 ) -> UserDTO:
-    if not user.is_active:
+    """
+    Authorizes the request by the access token claims, without loading the user.
+
+    The returned user is built from the claims: only ``id``, ``username``,
+    ``role`` and ``is_active`` are set, ``email``, ``is_email_verified`` and
+    ``password`` are always None. Handlers that need them must load the user
+    (e.g. with `get_current_auth_user_by_access`).
+    """
+    if not payload.active:
         logger.info(
             f"Authorization: "
-            f"Inactive user {user.id} is trying to get in by access token!"
+            f"Inactive user {payload.sub} is trying to get in by access token!"
         )
         raise HTTPExceptionInactiveUser
-    return user
+    return UserDTO(
+        id=payload.sub,
+        username=payload.username,
+        role=payload.role,
+        is_active=payload.active,
+    )
 
 
 async def get_current_active_admin(
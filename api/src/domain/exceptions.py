@@ -1,6 +1,11 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, status
 
 HTTPExceptionInternalServerError = HTTPException(
         status_code=500,
         detail="Something went wrong! Developers has already been notified and will fix this asap!",
 )
+
+HTTPExceptionInvalidCursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor!",
+)
@@ -0,0 +1,89 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+
+from api.src.domain.dependencies import get_current_active_admin
+from api.src.domain.monitoring.schemas import (
+    CacheStatsResponse,
+    DBPoolStatsResponse,
+    RedisPoolStatsResponse,
+    QueryStatsResponse,
+    PasswordHashingStatsResponse,
+)
+from api.src.domain.users.schemas import UserDTO
+from api.src.infrastructure.app import app
+
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get(
+    "/db-pool",
+    status_code=status.HTTP_200_OK,
+    response_model=DBPoolStatsResponse,
+    description="Database connection pool stats of the worker that served the request.",
+)
+async def get_db_pool_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> dict:
+    return app.db_pool_stats()
+
+
+@router.get(
+    "/redis-pools",
+    status_code=status.HTTP_200_OK,
+    response_model=list[RedisPoolStatsResponse],
+    description="Redis connection pools stats of the worker that served the request.",
+)
+async def get_redis_pool_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> list[dict]:
+    return app.redis_pool_stats()
+
+
+@router.get(
+    "/caches",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CacheStatsResponse],
+    description="Two-level caches stats of the worker that served the request.",
+)
+async def get_cache_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> list[dict]:
+    return app.cache_stats()
+
+
+@router.get(
+    "/queries",
+    status_code=status.HTTP_200_OK,
+    response_model=list[QueryStatsResponse],
+    description="SQL latency per repository method of the worker that served the request, "
+    "slowest total first.",
+)
+async def get_query_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> list[dict]:
+    return app.query_stats.snapshot()
+
+
+@router.delete(
+    "/queries",
+    status_code=status.HTTP_204_NO_CONTENT,
+    description="Resets SQL latency stats of the worker that served the request.",
+)
+async def reset_query_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> None:
+    app.query_stats.reset()
+
+
+@router.get(
+    "/password-hashing",
+    status_code=status.HTTP_200_OK,
+    response_model=PasswordHashingStatsResponse,
+    description="Password hashing pool stats of the worker that served the request.",
+)
+async def get_password_hashing_stats(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+) -> dict:
+    return app.password_hasher.stats()
@@ -0,0 +1,76 @@
+from pydantic import BaseModel
+
+
+class DBPoolStats(BaseModel):
+    pool_class: str
+    size: int | None = None
+    max_overflow: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checkouts: int | None = None
+    timeouts: int | None = None
+    wait_time_total_ms: float | None = None
+    wait_time_avg_ms: float | None = None
+    wait_time_max_ms: float | None = None
+
+
+class DBReplicaStatsResponse(DBPoolStats):
+    url: str
+    available: bool
+    reads: int
+    failures: int
+
+
+class DBPoolStatsResponse(DBPoolStats):
+    replicas: list[DBReplicaStatsResponse] = []
+    replica_fallbacks: int = 0
+
+
+class RedisPoolStatsResponse(BaseModel):
+    url: str
+    kind: str
+    max_connections: int
+    in_use: int
+    idle: int
+
+
+class CacheStatsResponse(BaseModel):
+    namespace: str
+    local_hits: int
+    redis_hits: int
+    misses: int
+    coalesced: int
+    errors: int
+    get_count: int
+    get_avg_ms: float
+    get_max_ms: float
+    load_count: int
+    load_avg_ms: float
+    load_max_ms: float
+
+
+class QueryStatsResponse(BaseModel):
+    tag: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    histogram: dict[str, int]
+
+
+class PasswordHashingStatsResponse(BaseModel):
+    workers: int
+    max_queue_size: int
+    in_flight: int
+    queued: int
+    rejected: int
+    rounds: int | None = None
+    calibrated_hash_ms: float | None = None
+    rehashed: int
+    hash_count: int
+    hash_avg_ms: float
+    hash_max_ms: float
+    verify_count: int
+    verify_avg_ms: float
+    verify_max_ms: float
@@ -0,0 +1,341 @@
+import asyncio
+import datetime
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Callable, ContextManager
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from api.src.infrastructure.settings import settings
+
+from .schemas import OperationStatus
+
+
+logger = logging.getLogger("my_app")
+
+# статусы, в которые операция может перейти из текущего
+OPERATION_TRANSITIONS: dict[OperationStatus | None, set[OperationStatus]] = {
+    # запись в статусе PENDING создает API при постановке задачи
+    None: {
+        OperationStatus.PENDING,
+        OperationStatus.PROCESSING,
+        OperationStatus.FAILED,
+    },
+    OperationStatus.PENDING: {
+        OperationStatus.PROCESSING,
+        OperationStatus.FAILED,
+    },
+    OperationStatus.PROCESSING: {
+        OperationStatus.PROCESSING,
+        OperationStatus.COMPLETED,
+        OperationStatus.TOO_LONG,
+        OperationStatus.FAILED,
+    },
+    OperationStatus.COMPLETED: set(),
+    OperationStatus.TOO_LONG: set(),
+    OperationStatus.FAILED: set(),
+}
+
+
+# статусы, после которых операция больше не меняется
+FINAL_OPERATION_STATUSES = {
+    OperationStatus.COMPLETED,
+    OperationStatus.TOO_LONG,
+    OperationStatus.FAILED,
+}
+
+
+def get_operation_key(operation_id: str) -> str:
+    # не "celery-task-{id}": там остаются записи старого формата (строки),
+    # HGETALL по ним вернул бы WRONGTYPE
+    return f"operations:{operation_id}:record"
+
+
+OPERATION_CHANNEL_PREFIX = "operations:"
+
+
+def get_operation_channel(operation_id: str) -> str:
+    return f"{OPERATION_CHANNEL_PREFIX}{operation_id}"
+
+
+def get_operation_progress_key(operation_id: str) -> str:
+    return f"operations:{operation_id}:progress"
+
+
+class OperationRecorder:
+    """
+    Writes the Redis hash record of one download operation.
+
+    Every transition is a single pipelined ``HSET`` + ``EXPIRE`` + ``PUBLISH``
+    of the whole record to the operation channel. The record is tracked in
+    memory, so transitions are validated and published without reads.
+
+    Download progress is appended to a capped stream of the operation and
+    published to the same channel, throttled to one event per
+    ``settings.youtube.operation_progress_interval_seconds`` while downloading.
+    """
+
+    def __init__(
+        self,
+        redis_client: Callable[..., ContextManager[Redis]],
+        operation_id: str,
+    ) -> None:
+        self._redis_client = redis_client
+        self._operation_id = operation_id
+        self._key = get_operation_key(operation_id)
+        self._progress_key = get_operation_progress_key(operation_id)
+        self._record: dict[str, str] = {}
+        self._progress_reported_at = 0.0
+        self.status: OperationStatus | None = None
+
+    def start(self) -> None:
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        self._transition(
+            OperationStatus.PENDING,
+            settings.youtube.operation_ttl_seconds,
+            created_at=now,
+        )
+
+    def set_stage(self, stage: str) -> None:
+        self._transition(
+            OperationStatus.PROCESSING, settings.youtube.operation_ttl_seconds, stage=stage,
+        )
+
+    def complete(self, title: str, filename: str, duration: str, link: str) -> None:
+        self._transition(
+            OperationStatus.COMPLETED,
+            settings.youtube.operation_ttl_seconds,
+            title=title,
+            filename=filename,
+            duration=duration,
+            link=link,
+        )
+
+    def too_long(self, duration: str) -> None:
+        self._transition(
+            OperationStatus.TOO_LONG,
+            settings.youtube.operation_failed_ttl_seconds,
+            duration=duration,
+        )
+
+    def fail(self, error: str) -> None:
+        self._transition(
+            OperationStatus.FAILED,
+            settings.youtube.operation_failed_ttl_seconds,
+            error=error,
+        )
+
+    def progress_hook(self, progress: dict) -> None:
+        """
+        yt-dlp ``progress_hooks`` callback.
+        """
+        total_bytes = progress.get("total_bytes") or progress.get("total_bytes_estimate")
+        self.report_progress(
+            stage="download",
+            status=progress["status"],
+            downloaded_bytes=progress.get("downloaded_bytes"),
+            # оценка размера приходит дробным числом
+            total_bytes=int(total_bytes) if total_bytes else None,
+            speed=progress.get("speed"),
+            eta=progress.get("eta"),
+        )
+
+    def postprocessor_hook(self, progress: dict) -> None:
+        """
+        yt-dlp ``postprocessor_hooks`` callback.
+        """
+        if progress["status"] == "started" and self._record.get("stage") != "postprocess":
+            # смена этапа не должна прерывать скачивание, этап будет записан
+            # при следующем событии постобработки или при загрузке в s3
+            try:
+                self.set_stage("postprocess")
+            except (RedisError, ValueError) as exp:
+                logger.warning(
+                    f"Operations: Stage of {self._operation_id} is not updated: {exp}"
+                )
+        self.report_progress(
+            stage="postprocess",
+            status=progress["status"],
+            postprocessor=progress.get("postprocessor"),
+        )
+
+    def report_progress(self, stage: str, status: str, **fields: int | float | str | None) -> None:
+        """
+        Appends a progress event of the current stage.
+
+        Intermediate ``downloading`` / ``processing`` events are dropped if the
+        previous event was reported less than the progress interval ago.
+        Reporting is best-effort: Redis errors are logged, not raised, so they
+        don't abort the download.
+        """
+        now = time.monotonic()
+        if (
+            status in ("downloading", "processing")
+            and now - self._progress_reported_at
+            < settings.youtube.operation_progress_interval_seconds
+        ):
+            return
+        self._progress_reported_at = now
+
+        progress = {"stage": stage, "status": status}
+        progress.update({key: value for key, value in fields.items() if value is not None})
+        event = {"operation_id": self._operation_id, **self._record, "progress": progress}
+        event.pop("error", None)
+
+        try:
+            with self._redis_client() as client:
+                pipe = client.pipeline(transaction=False)
+                pipe.xadd(
+                    self._progress_key,
+                    progress,
+                    maxlen=settings.youtube.operation_progress_stream_maxlen,
+                    approximate=True,
+                )
+                pipe.expire(self._progress_key, settings.youtube.operation_ttl_seconds)
+                pipe.publish(get_operation_channel(self._operation_id), json.dumps(event))
+                pipe.execute()
+        except RedisError as exp:
+            logger.warning(
+                f"Operations: Progress of {self._operation_id} is not reported: {exp}"
+            )
+
+    def _transition(self, status: OperationStatus, ttl_seconds: int, **fields: str) -> None:
+        if status not in OPERATION_TRANSITIONS[self.status]:
+            raise ValueError(f"Invalid operation transition {self.status} -> {status}!")
+
+        mapping = {
+            "status": status.value,
+            "updated_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            **fields,
+        }
+        record = {**self._record, **mapping}
+        event = {"operation_id": self._operation_id, **record}
+        # текст ошибки остается только в записи операции
+        event.pop("error", None)
+
+        with self._redis_client() as client:
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(self._key, mapping=mapping)
+            pipe.expire(self._key, ttl_seconds)
+            pipe.publish(get_operation_channel(self._operation_id), json.dumps(event))
+            pipe.execute()
+        self._record = record
+        self.status = status
+
+
+class OperationEventsBroker:
+    """
+    One pub/sub subscriber per process that fans operation events out to the
+    streams watching them.
+
+    The subscriber uses its own connection (not the app pool) and a single
+    ``PSUBSCRIBE operations:*``, so the number of watched operations and
+    streams does not change the number of Redis connections. After a
+    reconnect every stream gets a ``None`` item to re-read the operations
+    state, since events published in between are lost.
+    """
+
+    def __init__(self, url: str, reconnect_delay_seconds: float = 1.0) -> None:
+        self._url = url
+        self._reconnect_delay_seconds = reconnect_delay_seconds
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        self._reconnected = False
+
+    @asynccontextmanager
+    async def subscribe(self, operation_ids: list[str]) -> AsyncGenerator[asyncio.Queue, None]:
+        """
+        Subscribes to events of the operations.
+
+        Yields:
+            asyncio.Queue: Raw JSON events of the operations, or None when the
+                subscriber reconnected and events could have been lost.
+
+        Raises:
+            RedisError: If the subscriber is not connected within the Redis
+                pool timeout.
+        """
+        self._start()
+        queue = asyncio.Queue()
+        for operation_id in operation_ids:
+            self._subscribers.setdefault(operation_id, set()).add(queue)
+        try:
+            try:
+                await asyncio.wait_for(
+                    self._ready.wait(), timeout=settings.redis.pool_timeout_seconds,
+                )
+            except TimeoutError:
+                raise RedisError("Operation events subscriber is not connected!")
+            yield queue
+        finally:
+            for operation_id in operation_ids:
+                queues = self._subscribers.get(operation_id)
+                if queues is None:
+                    continue
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[operation_id]
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        if self._task is None or self._task.get_loop() is not loop:
+            # очереди другого event loop (например, между тестами) уже никто не читает
+            self._ready = asyncio.Event()
+            self._subscribers.clear()
+        else:
+            # задача завершилась, открытые потоки перечитают состояние после подписки
+            self._ready.clear()
+        self._reconnected = bool(self._subscribers)
+        self._task = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with AsyncRedis.from_url(self._url, decode_responses=True) as client:
+                    async with client.pubsub() as pubsub:
+                        await pubsub.psubscribe(f"{OPERATION_CHANNEL_PREFIX}*")
+                        async for message in pubsub.listen():
+                            self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as exp:
+                logger.warning(f"Operation events: Subscriber disconnected: {exp}")
+            except Exception:
+                # иначе задача завершилась бы, и открытые потоки больше не получали бы событий
+                logger.exception("Operation events: Subscriber failed!")
+            self._ready.clear()
+            self._reconnected = True
+            await asyncio.sleep(self._reconnect_delay_seconds)
+
+    def _dispatch(self, message: dict) -> None:
+        if message["type"] == "psubscribe":
+            # подписка подтверждена, события после нее не теряются
+            self._ready.set()
+            if not self._reconnected:
+                return
+            for queues in self._subscribers.values():
+                for queue in queues:
+                    queue.put_nowait(None)
+        elif message["type"] == "pmessage":
+            operation_id = message["channel"].removeprefix(OPERATION_CHANNEL_PREFIX)
+            for queue in self._subscribers.get(operation_id, ()):
+                queue.put_nowait(message["data"])
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        if task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._subscribers.clear()
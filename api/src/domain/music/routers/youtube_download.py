@@ -1,9 +1,17 @@
-from typing import Annotated
+from typing import Annotated, AsyncGenerator
+from uuid import uuid4
 
 from fastapi import APIRouter, status, Query
+from fastapi.responses import StreamingResponse
 
-from api.src.domain.music.schemas import FileInfoResponse, OperationId
+from api.src.domain.music.schemas import (
+    FileInfoResponse,
+    OperationId,
+    OperationNotFoundEvent,
+    OperationProgressResponse,
+)
 from api.src.infrastructure.app import app
+from api.src.infrastructure.settings import settings
 from api.src.domain.music.tasks import download_audio
 
 
@@ -18,8 +26,10 @@ router = APIRouter(prefix="/youtube", tags=["Youtube"])
 async def start_downloading(
     url: Annotated[str, Query(pattern="^https://www.youtube.com/watch")],
 ) -> dict:
-    task = download_audio.delay(url)
-    return {"operation_id": task.id}
+    operation_id = str(uuid4())
+    await app.youtube_service.create_operation(operation_id)
+    download_audio.apply_async(args=(url,), task_id=operation_id)
+    return {"operation_id": operation_id}
 
 
 @router.get(
@@ -29,8 +39,59 @@ async def start_downloading(
 )
 async def get_downloaded_file(
     operation_id: str,
+    wait: Annotated[
+        float, Query(ge=0, le=settings.youtube.operation_max_wait_seconds),
+    ] = 0,
 ) -> dict:
-    return await app.youtube_service.get_operation(operation_id)
+    return await app.youtube_service.get_operation(operation_id, wait=wait)
+
+
+@router.get(
+    "/download/progress",
+    status_code=status.HTTP_200_OK,
+    response_model=list[OperationProgressResponse],
+)
+async def get_download_progress(
+    operation_id: str,
+    after: str | None = None,
+) -> list[OperationProgressResponse]:
+    return await app.youtube_service.get_operation_progress(operation_id, after=after)
+
+
+@router.get(
+    "/download/events",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def stream_operation_events(
+    operation_id: Annotated[
+        list[str],
+        Query(min_length=1, max_length=settings.youtube.operation_events_max_ids),
+    ],
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of state changes of one or more operations.
+
+    Every event is an ``operation`` event with ``OperationEventResponse`` data,
+    or a ``not_found`` event for an operation that does not appear within the
+    grace period. The stream is closed when all operations are finished or
+    not found.
+    """
+    async def events() -> AsyncGenerator[str, None]:
+        async for event in app.youtube_service.watch_operations(operation_id):
+            if event is None:
+                # комментарий, чтобы прокси не закрыли простаивающее соединение
+                yield ": ping\n\n"
+            elif isinstance(event, OperationNotFoundEvent):
+                yield f"event: not_found\ndata: {event.model_dump_json()}\n\n"
+            else:
+                yield f"event: operation\ndata: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # @router.post("/save")
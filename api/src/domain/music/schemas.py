@@ -1,7 +1,17 @@
+import datetime
+import enum
 from io import BytesIO
 from pydantic import BaseModel, ConfigDict
 
 
+class OperationStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    TOO_LONG = "TOO_LONG"
+    FAILED = "FAILED"
+
+
 class FileInfoResponse(BaseModel):
     title: str
     filename: str
@@ -9,6 +19,44 @@ class FileInfoResponse(BaseModel):
     link: str
 
 
+class OperationDTO(BaseModel):
+    status: OperationStatus
+    stage: str | None = None
+    created_at: datetime.datetime | None = None
+    updated_at: datetime.datetime
+    title: str | None = None
+    filename: str | None = None
+    duration: str | None = None
+    link: str | None = None
+    error: str | None = None
+
+
+class OperationProgressResponse(BaseModel):
+    id: str | None = None
+    stage: str
+    status: str
+    downloaded_bytes: int | None = None
+    total_bytes: int | None = None
+    speed: float | None = None
+    eta: float | None = None
+    postprocessor: str | None = None
+
+
+class OperationEventResponse(BaseModel):
+    operation_id: str
+    status: OperationStatus
+    stage: str | None = None
+    title: str | None = None
+    filename: str | None = None
+    duration: str | None = None
+    link: str | None = None
+    progress: OperationProgressResponse | None = None
+
+
+class OperationNotFoundEvent(BaseModel):
+    operation_id: str
+
+
 class OperationId(BaseModel):
     operation_id: str
 
@@ -1,4 +1,7 @@
-from typing import Callable, AsyncContextManager
+import asyncio
+import datetime
+import time
+from typing import AsyncGenerator, Callable, AsyncContextManager
 
 from redis import Redis
 
@@ -8,6 +11,19 @@ from api.src.domain.music.exceptions import (
     HTTPExceptionVideoIsTooLong,
 )
 from api.src.domain.exceptions import HTTPExceptionInternalServerError
+from api.src.domain.music.operations import (
+    FINAL_OPERATION_STATUSES,
+    OperationEventsBroker,
+    get_operation_key,
+    get_operation_progress_key,
+)
+from api.src.domain.music.schemas import (
+    OperationDTO,
+    OperationEventResponse,
+    OperationNotFoundEvent,
+    OperationProgressResponse,
+    OperationStatus,
+)
 from api.src.infrastructure.settings import settings
 
 
@@ -15,28 +31,191 @@ class YoutubeService:
     def __init__(
         self,
         redis_client: Callable[..., AsyncContextManager[Redis]],
+        events_broker: OperationEventsBroker,
     ):
         self._redis_client = redis_client
+        self._events_broker = events_broker
+
+    async def create_operation(self, operation_id: str) -> None:
+        """
+        Creates the PENDING record of an operation before its task is queued,
+        so that requests for unknown operations can be answered at once.
+        """
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        async with self._redis_client(settings.redis.app_url) as client:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    get_operation_key(operation_id),
+                    mapping={
+                        "status": OperationStatus.PENDING.value,
+                        "created_at": now,
+                        "updated_at": now,
+                    },
+                )
+                pipe.expire(
+                    get_operation_key(operation_id), settings.youtube.operation_ttl_seconds,
+                )
+                await pipe.execute()
+
+    async def get_operation(self, operation_id: str, wait: float = 0) -> dict | None:
+        """
+        Returns the downloaded file info of the operation.
+
+        Args:
+            operation_id (str): Id of the download operation.
+            wait (float): Seconds to wait for the operation to finish (long
+                polling) before answering. The wait is a subscription to the
+                operation events, not a polling loop, and holds no Redis
+                connection. Unknown operations are answered at once.
 
-    async def get_operation(self, operation_id: str) -> dict | None:
-        formated_operation_id = f"celery-task-{operation_id}"
+        Raises:
+            HTTPException: If the operation is not found, not finished yet,
+                or finished without a file.
+        """
+        if wait > 0:
+            try:
+                async with asyncio.timeout(wait):
+                    # запись создается при постановке задачи, ее отсутствие - 404 сразу
+                    async for event in self.watch_operations(
+                        [operation_id], unknown_grace_seconds=0,
+                    ):
+                        if isinstance(event, OperationNotFoundEvent):
+                            raise HTTPExceptionOperationNotFound
+            except TimeoutError:
+                pass
 
         async with self._redis_client(settings.redis.app_url) as client:
-            is_exist = await client.exists(formated_operation_id)
-            if not is_exist:
-                raise HTTPExceptionOperationNotFound
-            data = await client.lrange(formated_operation_id, 0, -1)
+            record = await client.hgetall(get_operation_key(operation_id))
+        if not record:
+            raise HTTPExceptionOperationNotFound
 
-        if len(data) == 1:
+        operation = OperationDTO.model_validate(record)
+        if operation.status in (OperationStatus.PENDING, OperationStatus.PROCESSING):
             raise HTTPExceptionFileNotReady
-        elif data[1] == "__too_long__":
+        elif operation.status == OperationStatus.TOO_LONG:
             raise HTTPExceptionVideoIsTooLong
-        elif data[1] == "__exception__":
+        elif operation.status == OperationStatus.FAILED:
             raise HTTPExceptionInternalServerError
         else:
-            return {
-                "title": data[1],
-                "filename": data[2],
-                "duration": data[3],
-                "link": data[4],
-            }
+            return operation.model_dump(include={"title", "filename", "duration", "link"})
+
+    async def _read_operations(
+        self, operation_ids: list[str],
+    ) -> dict[str, OperationEventResponse]:
+        """
+        Reads the state and the last progress event of every existing operation.
+        """
+        async with self._redis_client(settings.redis.app_url) as client:
+            async with client.pipeline(transaction=False) as pipe:
+                for operation_id in operation_ids:
+                    pipe.hgetall(get_operation_key(operation_id))
+                    pipe.xrevrange(get_operation_progress_key(operation_id), count=1)
+                results = await pipe.execute()
+
+        operations = {}
+        for operation_id, record, progress in zip(operation_ids, results[::2], results[1::2]):
+            if not record:
+                continue
+            event = OperationEventResponse(operation_id=operation_id, **record)
+            if progress:
+                [(progress_id, fields)] = progress
+                event.progress = OperationProgressResponse(id=progress_id, **fields)
+            operations[operation_id] = event
+        return operations
+
+    async def watch_operations(
+        self,
+        operation_ids: list[str],
+        unknown_grace_seconds: float | None = None,
+    ) -> AsyncGenerator[OperationEventResponse | OperationNotFoundEvent | None, None]:
+        """
+        Streams state changes of the operations.
+
+        Events come from the process-wide `OperationEventsBroker`, so a stream
+        holds no Redis connection while waiting. The current state of every
+        operation is sent first, it is read after subscribing, so no change
+        between the read and the subscription is lost.
+
+        Args:
+            operation_ids (list[str]): Ids of the operations to watch.
+            unknown_grace_seconds (float | None): How long to wait for operations
+                without a record to appear before reporting them not found.
+                Defaults to ``settings.youtube.operation_events_unknown_grace_seconds``.
+
+        Yields:
+            OperationEventResponse | OperationNotFoundEvent | None: New state of
+                an operation, an operation that does not exist, or None when
+                nothing changed for the heartbeat interval. The stream ends when
+                all operations are final or not found.
+        """
+        if unknown_grace_seconds is None:
+            unknown_grace_seconds = settings.youtube.operation_events_unknown_grace_seconds
+        pending = set(operation_ids)
+        unknown = set()
+        unknown_deadline = time.monotonic() + unknown_grace_seconds
+
+        async with self._events_broker.subscribe(operation_ids) as queue:
+            operations = await self._read_operations(operation_ids)
+            for operation_id in operation_ids:
+                event = operations.get(operation_id)
+                if event is None:
+                    unknown.add(operation_id)
+                    continue
+                if event.status in FINAL_OPERATION_STATUSES:
+                    pending.discard(operation_id)
+                yield event
+
+            while pending:
+                timeout = settings.youtube.operation_events_heartbeat_seconds
+                if unknown:
+                    timeout = min(timeout, unknown_deadline - time.monotonic())
+                    if timeout <= 0:
+                        # операции без записи не создавались или уже истекли
+                        for operation_id in unknown:
+                            yield OperationNotFoundEvent(operation_id=operation_id)
+                        pending -= unknown
+                        unknown.clear()
+                        continue
+
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except TimeoutError:
+                    if not unknown:
+                        yield None
+                    continue
+
+                if data is None:
+                    # подписчик переподключался, события могли потеряться
+                    events = list(
+                        (await self._read_operations(list(pending))).values()
+                    )
+                else:
+                    events = [OperationEventResponse.model_validate_json(data)]
+
+                for event in events:
+                    if event.operation_id not in pending:
+                        continue
+                    unknown.discard(event.operation_id)
+                    if event.status in FINAL_OPERATION_STATUSES:
+                        pending.discard(event.operation_id)
+                    yield event
+
+    async def get_operation_progress(
+        self, operation_id: str, after: str | None = None,
+    ) -> list[OperationProgressResponse]:
+        """
+        Returns progress events of the operation.
+
+        Args:
+            operation_id (str): Id of the download operation.
+            after (str | None): Id of the last received event, only newer
+                events are returned.
+        """
+        async with self._redis_client(settings.redis.app_url) as client:
+            entries = await client.xrange(
+                get_operation_progress_key(operation_id),
+                min=f"({after}" if after else "-",
+            )
+        return [
+            OperationProgressResponse(id=entry_id, **fields) for entry_id, fields in entries
+        ]
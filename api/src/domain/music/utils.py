@@ -2,6 +2,7 @@ import os
 import re
 import time
 from io import BytesIO
+from typing import Callable
 
 import yt_dlp
 
@@ -32,7 +33,11 @@ def convert_str_duration_to_float(duration: str) -> float:
     return result
 
 
-def download_audio_from_youtube(url: str) -> FileDTO:
+def download_audio_from_youtube(
+    url: str,
+    progress_hook: Callable[[dict], None] | None = None,
+    postprocessor_hook: Callable[[dict], None] | None = None,
+) -> FileDTO:
     PROXY_LOCAL = os.environ.get("YTDLP_PROXY", os.environ.get("ALL_PROXY", DEFAULT_YTDLP_PROXY))
 
     ydl_opts = {
@@ -65,6 +70,10 @@ def download_audio_from_youtube(url: str) -> FileDTO:
         },
         'force_generic_extractor': False,
     }
+    if progress_hook is not None:
+        ydl_opts["progress_hooks"] = [progress_hook]
+    if postprocessor_hook is not None:
+        ydl_opts["postprocessor_hooks"] = [postprocessor_hook]
 
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         max_retries = 5
@@ -1,4 +1,4 @@
-from sqlalchemy import VARCHAR, BOOLEAN, text, Enum
+from sqlalchemy import VARCHAR, BOOLEAN, text, Enum, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from api.src.infrastructure.database.models import Base, uuid_pk
@@ -7,6 +7,10 @@ from api.src.infrastructure.database.enums import Roles
 
 class SQLAlchemyUserModel(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # keyset пагинация по (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid_pk]
     username: Mapped[str] = mapped_column(VARCHAR(32), unique=True, nullable=False)
@@ -27,3 +31,9 @@ class SQLAlchemyUserModel(Base):
         server_default=text("'USER'::roles"),
         nullable=False,
     )
+
+
+# регистронезависимый поиск при логине: lower(username) = lower(:login),
+# не уникальные: уникальность username и email остается с учетом регистра
+Index("ix_users_lower_username", func.lower(SQLAlchemyUserModel.username))
+Index("ix_users_lower_email", func.lower(SQLAlchemyUserModel.email))
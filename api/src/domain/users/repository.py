@@ -1,12 +1,13 @@
 import logging
-from uuid import uuid4
+from typing import AsyncGenerator
+from uuid import UUID, uuid4
 
-from pydantic import UUID4
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select, insert, update, or_, delete
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.src.infrastructure.database.repository import AbstractSQLAlchemyRepository
+from api.src.infrastructure.database.pagination import encode_cursor, keyset_after
 from api.src.domain.users.models import SQLAlchemyUserModel
 from api.src.infrastructure.database.exceptions import (
     ConstraintViolation,
@@ -53,6 +54,44 @@ class SQLAlchemyUserRepository(AbstractSQLAlchemyRepository):
         result = await self._session.execute(stmt)
         return [UserDTO.model_validate(user) for user in result.scalars().all()]
 
+    async def list_page(
+        self, *filter_, cursor: str | None = None, limit: int = 100, **filter_by_,
+    ) -> tuple[list[UserDTO], str | None]:
+        stmt = (
+            select(self._model)
+            .filter(*filter_)
+            .filter_by(**filter_by_)
+            .order_by(self._model.created_at, self._model.id)
+            .limit(limit + 1)
+        )
+        if cursor:
+            stmt = stmt.filter(
+                keyset_after(self._model.created_at, self._model.id, cursor)
+            )
+
+        result = await self._session.execute(stmt)
+        rows = result.scalars().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return [UserDTO.model_validate(row) for row in rows], next_cursor
+
+    async def stream_all(
+        self, *filter_, batch_size: int = 1000, **filter_by_,
+    ) -> AsyncGenerator[UserDTO, None]:
+        stmt = (
+            select(self._model)
+            .filter(*filter_)
+            .filter_by(**filter_by_)
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self._session.stream_scalars(stmt)
+        async for user in result:
+            yield UserDTO.model_validate(user)
+
     async def create(self, data: UserDTO) -> UserDTO:
         if not data.id:
             data.id = uuid4()
@@ -72,26 +111,8 @@ class SQLAlchemyUserRepository(AbstractSQLAlchemyRepository):
         return UserDTO.model_validate(result.scalars().one())
 
     async def update(self, _id: str, data: UserDTO) -> UserDTO:
-        user = await self._session.get(self._model, _id)
-        if not user:
-            raise EntityNotFound(f"User {_id} not found!")
-
-        if (data.email and data.email != user.email) or (
-            data.username and data.username != user.username
-        ):
-            existing = await self._session.execute(
-                select(self._model).where(
-                    self._model.id != _id,
-                    or_(
-                        self._model.email == data.email,
-                        self._model.username == data.username,
-                    ),
-                )
-            )
-            if existing.scalars().all():
-                raise ConstraintViolation("Username or email is already in use")
-
-        data.id = UUID4(_id)
+        # уникальность email/username проверяется constraint-ами бд
+        data.id = UUID(str(_id))
         stmt = (
             update(self._model)
             .where(self._model.id == _id)
@@ -105,20 +126,23 @@ class SQLAlchemyUserRepository(AbstractSQLAlchemyRepository):
             logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
             raise ConstraintViolation(f"Constraint violation: {str(exp)}")
 
-        return UserDTO.model_validate(result.scalars().one())
-
-    async def delete(self, _id) -> None:
-        user = await self._session.get(self._model, _id)
+        user = result.scalars().one_or_none()
         if not user:
             raise EntityNotFound(f"User {_id} not found!")
+        return UserDTO.model_validate(user)
 
+    async def delete(self, _id) -> None:
+        stmt = delete(self._model).where(self._model.id == _id).returning(self._model.id)
         try:
-            await self._session.delete(user)
+            result = await self._session.execute(stmt)
             await self._session.flush()
         except IntegrityError as exp:
             logger.error(f"SQLAlchemyError IntegrityError: {str(exp)}")
             raise ConstraintViolation(f"Constraint violation: {str(exp)}")
 
+        if result.scalar_one_or_none() is None:
+            raise EntityNotFound(f"User {_id} not found!")
+
     async def delete_by(self, *filter_, **filter_by_) -> None:
         try:
             del_stmt = delete(self._model).filter(*filter_).filter_by(**filter_by_)
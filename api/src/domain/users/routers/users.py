@@ -1,15 +1,20 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 
 from api.src.domain.users.schemas import (
     UserUpdateRequest,
     UserCreateRequest,
     UserDTO,
     UserDataResponse,
+    UserListResponse,
+)
+from api.src.domain.dependencies import (
+    get_current_active_user,
+    get_current_active_admin,
+    request_unit_of_work,
 )
-from api.src.domain.dependencies import get_current_active_user
 from api.src.domain.users.exceptions import HTTPExceptionUserNotFound
 from api.src.domain.auth.exceptions import HTTPExceptionNoPermission
 # from api.src.domain.auth.tasks import send_email
@@ -19,7 +24,11 @@ from api.src.infrastructure.app import app
 
 logger = logging.getLogger("my_app")
 
-router = APIRouter(prefix="/users", tags=["User"])
+router = APIRouter(
+    prefix="/users",
+    tags=["User"],
+    dependencies=[Depends(request_unit_of_work)],
+)
 
 
 @router.post(
@@ -39,6 +48,22 @@ async def create_user(
     return new_user
 
 
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=UserListResponse,
+    description="Lists users page by page. Pass `next_cursor` of the previous page "
+    "as `cursor` to get the next one. Can be used by admins.",
+)
+async def list_users(
+    _: Annotated[UserDTO, Depends(get_current_active_admin)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> dict:
+    users, next_cursor = await app.user_service.list_page(cursor=cursor, limit=limit)
+    return {"items": users, "next_cursor": next_cursor}
+
+
 @router.get(
     "/{user_id}",
     status_code=status.HTTP_200_OK,
@@ -66,6 +91,11 @@ async def update_user(
     data: UserUpdateRequest,
     current_user: Annotated[UserDTO, Depends(get_current_active_user)],
 ) -> None:
+    # хеширование до первого запроса: соединение scope берется лениво
+    # и не простаивает в транзакции, пока работает bcrypt
+    password_hash = (
+        await app.user_service.hash_password(data.password) if data.password else None
+    )
     target_user = await app.user_service.get_by_id(user_id)
 
     if not target_user:
@@ -112,7 +142,14 @@ async def update_user(
     await app.user_service.update(
         user_id=str(target_user.id),
         data=data,
+        password_hash=password_hash,
     )
+    if (
+        (data.role is not None and data.role != target_user.role)
+        or (data.is_active is not None and data.is_active != target_user.is_active)
+    ):
+        # role и active зашиты в access токены пользователя
+        await app.auth_service.revoke_access_tokens(str(target_user.id))
 
     logger.info(
         f"User:\n"
@@ -140,6 +177,7 @@ async def delete_user(
 
     await app.user_service.delete(user_id=str(target_user.id))
     await app.auth_service.delete_all_refresh_tokens_by_user_id(user_id=str(target_user.id))
+    await app.auth_service.revoke_access_tokens(str(target_user.id))
     logger.info(
         f"User:\n"
         f"'{user.role}:{user.username}:{user.id}' deleted profile of "
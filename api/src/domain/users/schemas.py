@@ -41,3 +41,8 @@ class UserDataResponse(BaseModel):
     is_active: bool
     is_email_verified: bool
     role: Roles
+
+
+class UserListResponse(BaseModel):
+    items: list[UserDataResponse]
+    next_cursor: str | None = None
@@ -7,13 +7,16 @@ from .exceptions import (
     HTTPExceptionUserNotFound,
     HTTPExceptionEmailAlreadyVerified,
 )
-from api.src.domain.auth.utils import get_password_hash
+from api.src.domain.exceptions import HTTPExceptionInvalidCursor
 from api.src.infrastructure.dal.uow import AbstractUnitOfWork
 from api.src.infrastructure.dal.datasource import AbstractUnitDataSource
+from api.src.infrastructure.password_hasher import ProcessPoolPasswordHasher
+from api.src.infrastructure.cache import TwoLevelCache
 
 from api.src.infrastructure.database.exceptions import (
     ConstraintViolation,
     EntityNotFound,
+    InvalidCursor,
 )
 
 
@@ -24,15 +27,23 @@ class UserService:
     def __init__(
         self,
         unit_of_work: AbstractUnitOfWork[AbstractUnitDataSource],
+        password_hasher: ProcessPoolPasswordHasher,
+        auth_user_cache: TwoLevelCache,
     ):
         self.uow = unit_of_work
+        self._password_hasher = password_hasher
+        self._auth_user_cache = auth_user_cache
 
     async def create(self, user: UserCreateRequest) -> UserDTO:
+        # хеширование до открытия транзакции, чтобы не держать соединение
+        await self.uow.release()
+        password_hash = await self._password_hasher.hash(user.password)
+
         async with self.uow.begin() as datasource:
             new_user = UserDTO(
                 username=user.username,
                 email=str(user.email),
-                password=get_password_hash(user.password),
+                password=password_hash,
             )
 
             try:
@@ -48,14 +59,51 @@ class UserService:
             )
             return result
 
-    async def get_by_id(self, user_id: str) -> UserDTO:
-        async with self.uow.execute() as datasource:
+    async def get_by_id(self, user_id: str, primary: bool = False) -> UserDTO:
+        """
+        Args:
+            user_id (str): Id of the user.
+            primary (bool): Read from the primary instead of a replica, for
+                decisions that must not be based on replication lag.
+        """
+        async with (self.uow.begin() if primary else self.uow.execute()) as datasource:
             user = await datasource.users.find_by_id(_id=user_id)
             if not user:
                 logger.info(f"User with id: '{user_id}' does not exist!")
                 raise HTTPExceptionUserNotFound
             return user
 
+    async def get_auth_user(self, user_id: str) -> UserDTO:
+        """
+        Returns the user (without password) for access token authorization,
+        from cache when possible.
+        """
+        async def load_user() -> dict:
+            # с primary: отставшая реплика вернула бы данные до инвалидации
+            user = await self.get_by_id(user_id, primary=True)
+            return user.model_copy(update={"password": None}).model_dump(mode="json")
+
+        # одновременные запросы одного пользователя загружают его из бд один раз
+        cached_user = await self._auth_user_cache.get_or_set(str(user_id), load_user)
+        return UserDTO.model_validate(cached_user)
+
+    async def invalidate_auth_user(self, user_id: str) -> None:
+        """
+        Drops the cached user once the current changes are committed, so that
+        a concurrent request can't refill the cache with the old row.
+        """
+        await self.uow.after_commit(self._auth_user_cache.delete, str(user_id))
+
+    async def list_page(
+        self, cursor: str | None = None, limit: int = 100,
+    ) -> tuple[list[UserDTO], str | None]:
+        async with self.uow.execute() as datasource:
+            try:
+                return await datasource.users.list_page(cursor=cursor, limit=limit)
+            except InvalidCursor:
+                logger.info(f"Invalid pagination cursor: '{cursor}'")
+                raise HTTPExceptionInvalidCursor
+
     async def check_user_exist_by_email_and_is_not_verified(self, email: str) -> None:
         async with self.uow.execute() as datasource:
             user = await datasource.users.find_by(email=email)
@@ -73,13 +121,33 @@ class UserService:
             return False
         return True
 
-    async def update(self, user_id: str, data: UserUpdateRequest) -> None:
+    async def hash_password(self, password: str) -> str:
+        """
+        Hashes the password in the hasher pool. Call it before the first query
+        of a request scope, so its connection isn't held while hashing.
+        """
+        await self.uow.release()
+        return await self._password_hasher.hash(password)
+
+    async def update(
+        self, user_id: str, data: UserUpdateRequest, password_hash: str | None = None,
+    ) -> None:
+        """
+        Args:
+            user_id (str): Id of the user.
+            data (UserUpdateRequest): Fields to update.
+            password_hash (str | None): Hash of ``data.password`` made with
+                `hash_password()` in advance, hashed here if not passed.
+        """
+        if data.password:
+            data.password = password_hash or await self.hash_password(data.password)
+
         async with self.uow.begin() as datasource:
-            user = await self.get_by_id(user_id)
+            user = await datasource.users.find_by_id(_id=user_id)
+            if not user:
+                raise HTTPExceptionUserNotFound
             if data.email != user.email:
                 data.is_email_verified = False
-            if data.password:
-                data.password = get_password_hash(data.password)
 
             try:
                 await datasource.users.update(user_id, UserDTO.model_validate(data))
@@ -88,6 +156,10 @@ class UserService:
             except ConstraintViolation:
                 raise HTTPExceptionUserAlreadyExists
 
+        await self.invalidate_auth_user(user_id)
+
     async def delete(self, user_id: str) -> None:
         async with self.uow.begin() as datasource:
             await datasource.users.delete(user_id)
+
+        await self.invalidate_auth_user(user_id)
@@ -2,32 +2,84 @@ from functools import cached_property
 from contextlib import asynccontextmanager, contextmanager
 from typing import AsyncGenerator, Generator
 from redis.asyncio import Redis as AsyncRedis
-from redis import Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis import BlockingConnectionPool, Redis
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.pool import NullPool
 
+from api.src.domain.music.operations import OperationEventsBroker
 from api.src.domain.music.services import YoutubeService
 from api.src.domain.users.service import UserService
 from api.src.domain.auth.service import AuthService
+from api.src.domain.auth.token_store import (
+    AbstractRefreshTokenStore,
+    RedisRefreshTokenStore,
+    SQLAlchemyRefreshTokenStore,
+)
+from api.src.domain.auth.utils import (
+    calibrate_password_hash_rounds,
+    get_password_hash,
+    verify_and_update_password_hash,
+    verify_password_hash,
+)
 from api.src.infrastructure.dal.uow import SQLAlchemyUnitOfWork, AbstractUnitOfWork
+from api.src.infrastructure.dal.replicas import ReplicaSet
 from api.src.infrastructure.s3_client import AsyncS3Client, S3Client
+from api.src.infrastructure.cache import TwoLevelCache
+from api.src.infrastructure.password_hasher import ProcessPoolPasswordHasher
+from api.src.infrastructure.rate_limiter import SlidingWindowRateLimiter
+from api.src.infrastructure.redis_pool import get_redis_pool_stats
 from api.src.infrastructure.dal.datasource import (
     SQLAlchemyUnitDataSource,
     AbstractUnitDataSource,
 )
+from api.src.infrastructure.database.instrumentation import (
+    QueryStats,
+    instrument_engine,
+)
+from api.src.infrastructure.database.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    get_pool_stats,
+)
 
 from api.src.infrastructure.settings import settings
 
 
 class AppContainer:
     @cached_property
-    def _sqlalchemy_async_engine(self) -> AsyncEngine:
-        return create_async_engine(
-            url=settings.postgres.url,
-            poolclass=NullPool,
+    def query_stats(self) -> QueryStats:
+        return QueryStats()
+
+    def _create_sqlalchemy_async_engine(self, url: str) -> AsyncEngine:
+        if settings.postgres.pool_enabled:
+            pool_options = {
+                "poolclass": InstrumentedAsyncAdaptedQueuePool,
+                "pool_size": settings.postgres.pool_size,
+                "max_overflow": settings.postgres.pool_max_overflow,
+                "pool_timeout": settings.postgres.pool_timeout_seconds,
+                "pool_recycle": settings.postgres.pool_recycle_seconds,
+                "pool_pre_ping": settings.postgres.pool_pre_ping,
+            }
+        else:
+            pool_options = {"poolclass": NullPool}
+
+        engine = create_async_engine(
+            url=url,
+            **pool_options,
             # echo=True,
         )
+        if settings.postgres.query_stats_enabled:
+            instrument_engine(
+                engine.sync_engine,
+                stats=self.query_stats,
+                slow_query_threshold_ms=settings.postgres.slow_query_threshold_ms,
+            )
+        return engine
+
+    @cached_property
+    def _sqlalchemy_async_engine(self) -> AsyncEngine:
+        return self._create_sqlalchemy_async_engine(settings.postgres.url)
 
     @cached_property
     def _sqlalchemy_async_session_factory(self) -> async_sessionmaker[AsyncSession]:
@@ -36,11 +88,132 @@ class AppContainer:
             expire_on_commit=False,
         )
 
-    @staticmethod
+    @cached_property
+    def _sqlalchemy_async_replica_engines(self) -> list[AsyncEngine]:
+        return [
+            self._create_sqlalchemy_async_engine(url)
+            for url in settings.postgres.replica_urls
+        ]
+
+    @cached_property
+    def _replica_set(self) -> ReplicaSet:
+        return ReplicaSet(
+            session_factories=[
+                async_sessionmaker(bind=engine, expire_on_commit=False)
+                for engine in self._sqlalchemy_async_replica_engines
+            ],
+            retry_after_seconds=settings.postgres.replica_retry_after_seconds,
+        )
+
+    def db_pool_stats(self) -> dict:
+        """
+        Returns a snapshot of the database connection pools of the current process.
+        """
+        stats = get_pool_stats(self._sqlalchemy_async_engine.pool)
+        stats["replicas"] = [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                **get_pool_stats(engine.pool),
+                **replica_stats,
+            }
+            for engine, replica_stats in zip(
+                self._sqlalchemy_async_replica_engines, self._replica_set.stats(),
+            )
+        ]
+        stats["replica_fallbacks"] = self._replica_set.fallbacks
+        return stats
+
+    async def shutdown(self) -> None:
+        """
+        Releases long-lived resources owned by the container.
+        """
+        await self.close_connection_pools()
+        if "password_hasher" in self.__dict__:
+            self.password_hasher.shutdown()
+        if "async_s3_client" in self.__dict__:
+            await self.async_s3_client.close()
+        if "operation_events_broker" in self.__dict__:
+            await self.operation_events_broker.close()
+        self.close_redis_pools()
+
+    async def close_connection_pools(self) -> None:
+        """
+        Closes pooled database and async Redis connections, the engines and
+        clients stay usable and open new connections on demand (e.g. in
+        another event loop).
+        """
+        if "_sqlalchemy_async_engine" in self.__dict__:
+            await self._sqlalchemy_async_engine.dispose()
+        for engine in self.__dict__.get("_sqlalchemy_async_replica_engines", []):
+            await engine.dispose()
+        for pool in self._async_redis_pools.values():
+            await pool.aclose()
+        self._async_redis_pools.clear()
+
+    @cached_property
+    def _async_redis_pools(self) -> dict[str, AsyncBlockingConnectionPool]:
+        return {}
+
+    @cached_property
+    def _caches(self) -> dict[str, TwoLevelCache]:
+        return {}
+
+    def cache(
+        self,
+        namespace: str,
+        local_ttl_seconds: float = 5.0,
+        redis_ttl_seconds: int = 300,
+        local_max_size: int = 10000,
+    ) -> TwoLevelCache:
+        """
+        Returns the process-wide two-level cache of the namespace, creating it
+        with the given options on first use.
+        """
+        if namespace not in self._caches:
+            self._caches[namespace] = TwoLevelCache(
+                redis_client=self.async_redis_client,
+                namespace=namespace,
+                local_ttl_seconds=local_ttl_seconds,
+                redis_ttl_seconds=redis_ttl_seconds,
+                local_max_size=local_max_size,
+            )
+        return self._caches[namespace]
+
+    def cache_stats(self) -> list[dict]:
+        """
+        Returns hit/miss counters and latencies of the caches of the current process.
+        """
+        return [cache.stats() for cache in self._caches.values()]
+
+    @cached_property
+    def _redis_pools(self) -> dict[str, BlockingConnectionPool]:
+        return {}
+
+    def _get_async_redis_pool(self, url: str) -> AsyncBlockingConnectionPool:
+        if url not in self._async_redis_pools:
+            self._async_redis_pools[url] = AsyncBlockingConnectionPool.from_url(
+                url,
+                decode_responses=True,
+                max_connections=settings.redis.pool_max_connections,
+                timeout=settings.redis.pool_timeout_seconds,
+            )
+        return self._async_redis_pools[url]
+
+    def _get_redis_pool(self, url: str) -> BlockingConnectionPool:
+        if url not in self._redis_pools:
+            self._redis_pools[url] = BlockingConnectionPool.from_url(
+                url,
+                max_connections=settings.redis.pool_max_connections,
+                timeout=settings.redis.pool_timeout_seconds,
+            )
+        return self._redis_pools[url]
+
     @asynccontextmanager
-    async def async_redis_client(url: str = settings.redis.app_url) -> AsyncGenerator[Redis, None]:
+    async def async_redis_client(
+        self, url: str = settings.redis.app_url,
+    ) -> AsyncGenerator[AsyncRedis, None]:
         """
-        Async context manager for creating a temporary Redis client.
+        Async context manager for getting a Redis client.
 
         Args:
             url (str): Redis connection URL. Defaults to ``settings.redis.app_url``.
@@ -49,17 +222,26 @@ class AppContainer:
             Redis: An active Redis client instance.
 
         Notes:
-            - Opens a new connection for each context usage.
-            - Ensures the connection is closed when the context exits.
+            - Uses connections of the container pool for the URL, which are
+              returned to the pool when the context exits.
+            - With ``settings.redis.pool_enabled`` off opens a new connection
+              for each context usage.
         """
-        async with AsyncRedis.from_url(url, decode_responses=True) as client:
+        if not settings.redis.pool_enabled:
+            async with AsyncRedis.from_url(url, decode_responses=True) as client:
+                yield client
+            return
+
+        client = AsyncRedis(connection_pool=self._get_async_redis_pool(url))
+        try:
             yield client
+        finally:
+            await client.aclose()
 
-    @staticmethod
     @contextmanager
-    def redis_client(url: str = settings.redis.app_url) -> Generator[Redis, None, None]:
+    def redis_client(self, url: str = settings.redis.app_url) -> Generator[Redis, None, None]:
         """
-        Sync context manager for creating a temporary Redis client.
+        Sync context manager for getting a Redis client.
 
         Args:
             url (str): Redis connection URL. Defaults to ``settings.redis.app_url``.
@@ -68,25 +250,82 @@ class AppContainer:
             Redis: An active Redis client instance.
 
         Notes:
-            - Opens a new connection for each context usage.
-            - Ensures the connection is closed when the context exits.
+            - Uses connections of the container pool for the URL, which are
+              returned to the pool when the context exits.
+            - With ``settings.redis.pool_enabled`` off opens a new connection
+              for each context usage.
         """
-        with Redis.from_url(url) as client:
+        if not settings.redis.pool_enabled:
+            with Redis.from_url(url) as client:
+                yield client
+            return
+
+        with Redis(connection_pool=self._get_redis_pool(url)) as client:
             yield client
 
+    def redis_pool_stats(self) -> list[dict]:
+        """
+        Returns a snapshot of the Redis connection pools of the current process.
+        """
+        return [
+            get_redis_pool_stats(pool)
+            for pool in [*self._async_redis_pools.values(), *self._redis_pools.values()]
+        ]
+
+    def close_redis_pools(self) -> None:
+        """
+        Disconnects sync Redis pools, e.g. on Celery worker shutdown.
+        """
+        for pool in self._redis_pools.values():
+            pool.disconnect()
+        self._redis_pools.clear()
+
     @cached_property
     def async_s3_client(self) -> AsyncS3Client:
-        return AsyncS3Client(**settings.s3.config_dict)
+        return AsyncS3Client(
+            **settings.s3.config_dict,
+            max_pool_connections=settings.s3.max_pool_connections,
+            keepalive_timeout_seconds=settings.s3.keepalive_timeout_seconds,
+            tcp_keepalive=settings.s3.tcp_keepalive,
+        )
 
     @cached_property
     def s3_client(self) -> S3Client:
         return S3Client(**settings.s3.config_dict)
 
+    @cached_property
+    def password_hasher(self) -> ProcessPoolPasswordHasher:
+        return ProcessPoolPasswordHasher(
+            hash_func=get_password_hash,
+            verify_func=verify_password_hash,
+            verify_and_update_func=verify_and_update_password_hash,
+            calibrate_func=calibrate_password_hash_rounds,
+            max_workers=settings.auth.password_hashing_workers,
+            max_queue_size=settings.auth.password_hashing_max_queue_size,
+            rounds=settings.auth.password_hash_rounds,
+            max_rounds=settings.auth.password_hash_max_rounds,
+        )
+
+    @cached_property
+    def rate_limiter(self) -> SlidingWindowRateLimiter:
+        return SlidingWindowRateLimiter(redis_client=self.async_redis_client)
+
     @cached_property
     def unit_of_work(self) -> AbstractUnitOfWork[AbstractUnitDataSource]:
         return SQLAlchemyUnitOfWork(
             session_factory=self._sqlalchemy_async_session_factory,
             datasource=SQLAlchemyUnitDataSource,
+            replicas=self._replica_set,
+        )
+
+    @cached_property
+    def refresh_token_store(self) -> AbstractRefreshTokenStore:
+        if settings.auth.refresh_token_store == "postgres":
+            return SQLAlchemyRefreshTokenStore(unit_of_work=self.unit_of_work)
+        return RedisRefreshTokenStore(
+            redis_client=self.async_redis_client,
+            unit_of_work=self.unit_of_work,
+            flush_batch_size=settings.auth.refresh_tokens_write_behind_batch_size,
         )
 
     @cached_property
@@ -94,17 +333,33 @@ class AppContainer:
         return AuthService(
             unit_of_work=self.unit_of_work,
             redis_client=self.async_redis_client,
+            password_hasher=self.password_hasher,
+            refresh_token_store=self.refresh_token_store,
         )
 
     @cached_property
     def user_service(self) -> UserService:
-        return UserService(unit_of_work=self.unit_of_work)
+        return UserService(
+            unit_of_work=self.unit_of_work,
+            password_hasher=self.password_hasher,
+            auth_user_cache=self.cache(
+                "auth_user",
+                local_ttl_seconds=settings.auth.auth_user_cache_local_ttl_seconds,
+                redis_ttl_seconds=settings.auth.auth_user_cache_redis_ttl_seconds,
+                local_max_size=settings.auth.auth_user_cache_local_max_size,
+            ),
+        )
 
     @cached_property
     def youtube_service(self) -> YoutubeService:
         return YoutubeService(
             redis_client=self.async_redis_client,
+            events_broker=self.operation_events_broker,
         )
 
+    @cached_property
+    def operation_events_broker(self) -> OperationEventsBroker:
+        return OperationEventsBroker(settings.redis.app_url)
+
 
 app = AppContainer()
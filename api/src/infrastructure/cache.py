@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, AsyncContextManager, Awaitable, Callable, Iterable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger("my_app")
+
+
+class LRUTTLCache:
+    """
+    In-process LRU cache with a fixed time to live for every entry.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 5.0) -> None:
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = self._ttl_seconds
+        self._data[key] = (time.monotonic() + ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class _Flight:
+    """
+    Loading of one key by `TwoLevelCache.get_or_set()`.
+    """
+
+    def __init__(self, future: asyncio.Future, tags: set[str]) -> None:
+        self.future = future
+        self.tags = tags
+        # ключ или тег инвалидированы после начала загрузки
+        self.stale = False
+
+
+class TwoLevelCache:
+    """
+    JSON values cache: in-process LRU in front of Redis.
+
+    The local level is per worker process and is not invalidated across
+    processes, so its TTL bounds how stale other workers can be.
+    Redis errors are logged and treated as cache misses.
+
+    `get_or_set()` coalesces concurrent misses of a key in the process
+    (single-flight), so only one of them calls the loader. Entries can be
+    tagged and invalidated together with `invalidate_tag()`.
+    """
+
+    def __init__(
+        self,
+        redis_client: Callable[..., AsyncContextManager[Redis]],
+        namespace: str,
+        local_ttl_seconds: float = 5.0,
+        redis_ttl_seconds: int = 300,
+        local_max_size: int = 10000,
+    ) -> None:
+        self._redis_client = redis_client
+        self._namespace = namespace
+        self._redis_ttl_seconds = redis_ttl_seconds
+        self._local = LRUTTLCache(max_size=local_max_size, ttl_seconds=local_ttl_seconds)
+        self._in_flight: dict[str, _Flight] = {}
+        self._stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+        self._latency = {"get": [0, 0.0, 0.0], "load": [0, 0.0, 0.0]}
+
+    @property
+    def namespace(self) -> str:
+        return self._namespace
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self._namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"cache:{self._namespace}:tag:{tag}"
+
+    def _record_latency(self, operation: str, started_at: float) -> None:
+        duration = time.perf_counter() - started_at
+        latency = self._latency[operation]
+        latency[0] += 1
+        latency[1] += duration
+        latency[2] = max(latency[2], duration)
+
+    async def get(self, key: str) -> Any | None:
+        started_at = time.perf_counter()
+        try:
+            return await self._get(key)
+        finally:
+            self._record_latency("get", started_at)
+
+    async def _get(self, key: str) -> Any | None:
+        value = self._local.get(key)
+        if value is not None:
+            self._stats["local_hits"] += 1
+            return value
+
+        try:
+            async with self._redis_client() as client:
+                raw = await client.get(self._redis_key(key))
+        except RedisError as exp:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache: Redis get failed for '{self._redis_key(key)}': {exp}")
+            raw = None
+        if raw is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["redis_hits"] += 1
+        value = json.loads(raw)
+        self._local.set(key, value)
+        return value
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Returns the cached value or loads, caches and returns it.
+
+        Concurrent calls for the same key in the process wait for the first
+        loader call instead of calling the loader themselves. Loader errors are
+        raised to all of them, if the loading call is cancelled one of them
+        loads again. None values are not cached. A value loaded while the key
+        (or one of its tags) is invalidated is returned, but not cached.
+
+        Args:
+            key: Cache key in the namespace.
+            loader: Coroutine function loading the value on a miss.
+            tags: Tags of the entry for `invalidate_tag()`.
+        """
+        tags = set(tags)
+        while True:
+            value = await self.get(key)
+            if value is not None:
+                return value
+
+            flight = self._in_flight.get(key)
+            if flight is None:
+                return await self._load(key, loader, tags)
+
+            self._stats["coalesced"] += 1
+            try:
+                # shield: отмена одного ожидающего не должна отменять загрузку для остальных
+                return await asyncio.shield(flight.future)
+            except asyncio.CancelledError:
+                # отменена загрузка ведущего, а не этот вызов - повторить
+                if flight.future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+    async def _load(
+        self, key: str, loader: Callable[[], Awaitable[Any]], tags: set[str],
+    ) -> Any:
+        flight = _Flight(asyncio.get_running_loop().create_future(), tags)
+        self._in_flight[key] = flight
+        try:
+            started_at = time.perf_counter()
+            try:
+                value = await loader()
+            finally:
+                self._record_latency("load", started_at)
+            # инвалидация во время загрузки: значение могло устареть
+            if value is not None and not flight.stale:
+                await self.set(key, value, tags=tags)
+            flight.future.set_result(value)
+            return value
+        except Exception as exp:
+            flight.future.set_exception(exp)
+            # исключение уже передано вызывающему, ожидающих может не быть
+            flight.future.exception()
+            raise
+        except BaseException:
+            flight.future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()) -> None:
+        self._local.set(key, value)
+        try:
+            async with self._redis_client() as client:
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.set(
+                        self._redis_key(key), json.dumps(value), ex=self._redis_ttl_seconds,
+                    )
+                    for tag in tags:
+                        pipe.sadd(self._tag_key(tag), key)
+                        pipe.expire(self._tag_key(tag), self._redis_ttl_seconds)
+                    await pipe.execute()
+        except RedisError as exp:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache: Redis set failed for '{self._redis_key(key)}': {exp}")
+
+    async def delete(self, key: str) -> None:
+        self._local.delete(key)
+        if key in self._in_flight:
+            self._in_flight[key].stale = True
+        try:
+            async with self._redis_client() as client:
+                await client.delete(self._redis_key(key))
+        except RedisError as exp:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache: Redis delete failed for '{self._redis_key(key)}': {exp}")
+
+    async def invalidate_tag(self, tag: str) -> None:
+        """
+        Deletes all entries tagged with ``tag``.
+
+        Tagged keys are tracked in Redis only, so if Redis is unavailable the
+        local entries are left to expire by their TTL.
+        """
+        for flight in self._in_flight.values():
+            if tag in flight.tags:
+                flight.stale = True
+
+        try:
+            async with self._redis_client() as client:
+                keys = await client.smembers(self._tag_key(tag))
+                await client.delete(
+                    self._tag_key(tag), *(self._redis_key(key) for key in keys),
+                )
+        except RedisError as exp:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache: Redis invalidation failed for '{self._tag_key(tag)}': {exp}")
+            return
+
+        for key in keys:
+            self._local.delete(key)
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and latencies of the cache in the current process.
+        """
+        result = {"namespace": self._namespace, **self._stats}
+        for operation, (count, total, max_duration) in self._latency.items():
+            result[f"{operation}_count"] = count
+            result[f"{operation}_avg_ms"] = round(total / count * 1000, 3) if count else 0.0
+            result[f"{operation}_max_ms"] = round(max_duration * 1000, 3)
+        return result
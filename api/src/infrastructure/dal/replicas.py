@@ -0,0 +1,77 @@
+import time
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class ReplicaSet:
+    """
+    Round-robin selector over read replica session factories.
+
+    A replica that failed to connect is skipped for `retry_after_seconds`,
+    after which it is tried again.
+
+    Attributes:
+        reads: Number of read units of work served by each replica
+        failures: Number of failed connection attempts to each replica
+        fallbacks: Number of reads sent to the primary because no replica was available
+    """
+
+    def __init__(
+        self,
+        session_factories: Sequence[async_sessionmaker[AsyncSession]] = (),
+        retry_after_seconds: float = 30.0,
+    ) -> None:
+        self._session_factories = list(session_factories)
+        self._retry_after_seconds = retry_after_seconds
+        self._unavailable_until: list[float] = [0.0] * len(self._session_factories)
+        self._next = 0
+
+        self.reads: list[int] = [0] * len(self._session_factories)
+        self.failures: list[int] = [0] * len(self._session_factories)
+        self.fallbacks: int = 0
+
+    def __len__(self) -> int:
+        return len(self._session_factories)
+
+    def candidates(self) -> list[tuple[int, async_sessionmaker[AsyncSession]]]:
+        """
+        Returns available replicas in round-robin order starting from the next one.
+        """
+        count = len(self._session_factories)
+        if not count:
+            return []
+
+        start = self._next
+        self._next = (self._next + 1) % count
+
+        now = time.monotonic()
+        result = []
+        for offset in range(count):
+            index = (start + offset) % count
+            if self._unavailable_until[index] <= now:
+                result.append((index, self._session_factories[index]))
+        return result
+
+    def is_available(self, index: int) -> bool:
+        return self._unavailable_until[index] <= time.monotonic()
+
+    def mark_used(self, index: int) -> None:
+        self.reads[index] += 1
+
+    def mark_unavailable(self, index: int) -> None:
+        self.failures[index] += 1
+        self._unavailable_until[index] = time.monotonic() + self._retry_after_seconds
+
+    def mark_fallback(self) -> None:
+        self.fallbacks += 1
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "available": self.is_available(index),
+                "reads": self.reads[index],
+                "failures": self.failures[index],
+            }
+            for index in range(len(self._session_factories))
+        ]
@@ -1,10 +1,24 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Callable, Generic, TypeVar, AsyncContextManager
-
+from contextvars import ContextVar
+from typing import (
+    AsyncContextManager,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Generic,
+    TypeVar,
+)
+
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from api.src.infrastructure.dal.datasource import AbstractUnitDataSource
+from api.src.infrastructure.dal.replicas import ReplicaSet
+
+logger = logging.getLogger("my_app")
 
 TUnitDataSource = TypeVar("TUnitDataSource")
 
@@ -18,14 +32,47 @@ class AbstractUnitOfWork(ABC, Generic[TUnitDataSource]):
     def execute(self) -> AsyncContextManager[TUnitDataSource]:
         pass
 
+    @abstractmethod
+    def scope(self) -> AsyncContextManager[TUnitDataSource]:
+        pass
+
+    @abstractmethod
+    async def after_commit(self, callback: Callable[..., Awaitable], *args) -> None:
+        pass
+
+    @abstractmethod
+    async def release(self) -> None:
+        pass
+
+
+class _Scope:
+    """
+    Sessions opened by one `SQLAlchemyUnitOfWork.scope()`.
+    """
+
+    def __init__(self, primary: AsyncSession) -> None:
+        self.primary = primary
+        self.replica: AsyncSession | None = None
+        # после первой записи чтение идет с primary, чтобы видеть свои изменения
+        self.has_writes: bool = False
+        self.after_commit: list[tuple[Callable[..., Awaitable], tuple]] = []
+
 
 class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
     """
     SQLAlchemy implementation of Unit of Work pattern for managing dal transactions.
 
-    This class provides two main contexts for dal operations:
+    This class provides three main contexts for dal operations:
     - `begin()`: For write operations with automatic commit
     - `execute()`: For read operations without automatic commit
+    - `scope()`: Shares one session and transaction between all `begin()` and
+      `execute()` calls made inside it (e.g. during one HTTP request)
+
+    `after_commit()` defers side effects until the changes are committed.
+    `release()` returns the connections of a read-only scope to the pool.
+
+    Read operations are routed to read replicas (round-robin) when they are
+    configured, falling back to the primary when no replica is reachable.
 
     The Unit of Work encapsulates the session management and ensures that all
     repository operations within a single unit are executed within the same
@@ -34,6 +81,8 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
     Attributes:
         _session_factory: Factory for creating SQLAlchemy async sessions
         _datasource: Factory function that creates datasource with repositories
+        _replicas: Read replicas used by `execute()`
+        _scope: Sessions of the currently opened scope (per async context)
 
     """
 
@@ -41,19 +90,32 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
         self,
         session_factory: async_sessionmaker[AsyncSession],
         datasource: Callable[[AsyncSession], AbstractUnitDataSource],
+        replicas: ReplicaSet | None = None,
     ) -> None:
         self._session_factory = session_factory
         self._datasource = datasource
+        self._replicas = replicas or ReplicaSet()
+        self._scope: ContextVar[_Scope | None] = ContextVar(
+            f"uow_scope_{id(self)}", default=None,
+        )
 
     @asynccontextmanager
     async def begin(self) -> AsyncGenerator[AbstractUnitDataSource, None]:
         """
         Async context manager for create, update, delete operations with automatic commit.
 
+        Inside `scope()` joins the scope transaction, which is committed on scope exit.
+
         Yields:
             AbstractUnitDataSource: Datasource instance with all repositories
                                    configured for the current session
         """
+        scope = self._scope.get()
+        if scope is not None:
+            scope.has_writes = True
+            yield self._datasource(scope.primary)
+            return
+
         async with self._session_factory() as session:
             async with session.begin() as transaction:
                 yield self._datasource(session)
@@ -63,9 +125,123 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
     async def execute(self) -> AsyncGenerator[AbstractUnitDataSource, None]:
         """
         Async context manager for read operations without automatic commit.
+        Uses a read replica if one is available, otherwise the primary.
+
+        Inside `scope()` reuses the scope replica session, or the scope primary
+        session once the scope has written something.
+
         Yields:
             AbstractUnitDataSource: Datasource instance with all repositories
                                    configured for the current session
         """
-        async with self._session_factory() as session:
+        scope = self._scope.get()
+        if scope is not None:
+            if scope.has_writes:
+                yield self._datasource(scope.primary)
+                return
+            if scope.replica is None:
+                scope.replica = await self._open_replica_session()
+            yield self._datasource(scope.replica or scope.primary)
+            return
+
+        session = await self._open_replica_session() or self._session_factory()
+        async with session:
             yield self._datasource(session)
+
+    @asynccontextmanager
+    async def scope(self) -> AsyncGenerator[AbstractUnitDataSource, None]:
+        """
+        Async context manager that opens one session and one transaction for all
+        `begin()` and `execute()` calls made in the current async context.
+
+        The connection is checked out lazily on the first query. The transaction is
+        committed when the scope exits normally and rolled back on exception.
+        Reads made before the first write use one replica session for the whole scope.
+        A nested scope joins the outer one.
+
+        Yields:
+            AbstractUnitDataSource: Datasource instance with all repositories
+                                   configured for the scope primary session
+        """
+        if self._scope.get() is not None:
+            async with self.begin() as datasource:
+                yield datasource
+            return
+
+        async with self._session_factory() as session:
+            scope = _Scope(primary=session)
+            token = self._scope.set(scope)
+            try:
+                # транзакция начинается с первым запросом (autobegin), при исключении
+                # закрытие сессии откатывает ее
+                yield self._datasource(session)
+                await session.commit()
+            finally:
+                self._scope.reset(token)
+                if scope.replica is not None:
+                    await scope.replica.close()
+
+        for callback, args in scope.after_commit:
+            await callback(*args)
+
+    async def after_commit(self, callback: Callable[..., Awaitable], *args) -> None:
+        """
+        Runs ``callback(*args)`` once the current changes are committed.
+
+        Inside `scope()` the callback is deferred until the scope transaction is
+        committed and is dropped on rollback. Outside of it changes made by
+        `begin()` are already committed, so the callback is awaited immediately.
+
+        Used for side effects that must not be observed before the commit, e.g.
+        cache invalidation: invalidated earlier, the cache could be refilled
+        with the old row by a concurrent request.
+        """
+        scope = self._scope.get()
+        if scope is None:
+            await callback(*args)
+            return
+        scope.after_commit.append((callback, args))
+
+    async def release(self) -> None:
+        """
+        Returns the connections of the current scope to the pool before a long
+        wait that doesn't need the database (e.g. password hashing).
+
+        Only a scope without writes is released: its read transactions are
+        ended and the next query checks out a connection again. Does nothing
+        outside of a scope or once the scope has written something.
+        """
+        scope = self._scope.get()
+        if scope is None or scope.has_writes:
+            return
+        if scope.replica is not None:
+            await scope.replica.close()
+            scope.replica = None
+        await scope.primary.rollback()
+
+    async def _open_replica_session(self) -> AsyncSession | None:
+        """
+        Opens a session on the next reachable replica.
+
+        Returns:
+            AsyncSession | None: Connected replica session, or None if no replica
+                                 is configured or reachable.
+        """
+        if not len(self._replicas):
+            return None
+
+        for index, session_factory in self._replicas.candidates():
+            session = session_factory()
+            try:
+                await session.connection()
+            except (OSError, SQLAlchemyError, asyncio.TimeoutError) as exp:
+                await session.close()
+                self._replicas.mark_unavailable(index)
+                logger.warning(f"Database: Read replica #{index} is unavailable: {exp}")
+                continue
+
+            self._replicas.mark_used(index)
+            return session
+
+        self._replicas.mark_fallback()
+        return None
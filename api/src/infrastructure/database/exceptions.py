@@ -11,3 +11,9 @@ class EntityNotFound(AppException):
     """
     Raised when a entity cannot be found.
     """
+
+
+class InvalidCursor(AppException):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
@@ -0,0 +1,145 @@
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("my_app")
+
+# "SQLAlchemyUserRepository.find_by" для запросов, выполняемых методом репозитория
+current_query_tag: ContextVar[str | None] = ContextVar("current_query_tag", default=None)
+
+UNTAGGED_QUERY = "untagged"
+HISTOGRAM_BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def tag_queries(tag: str, func: callable) -> callable:
+    """
+    Wraps a coroutine or async generator function so that all statements it
+    executes are attributed to ``tag``.
+    """
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def async_gen_wrapper(*args, **kwargs):
+            agen = func(*args, **kwargs)
+            try:
+                while True:
+                    # тег выставляется только на время шага генератора,
+                    # чтобы не помечать запросы вызывающего кода между итерациями
+                    token = current_query_tag.set(tag)
+                    try:
+                        item = await agen.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        current_query_tag.reset(token)
+                    yield item
+            finally:
+                # при досрочном выходе из итерации закрыть генератор сразу,
+                # а не при сборке мусора (освободить курсор / соединение)
+                token = current_query_tag.set(tag)
+                try:
+                    await agen.aclose()
+                finally:
+                    current_query_tag.reset(token)
+
+        return async_gen_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_query_tag.set(tag)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current_query_tag.reset(token)
+
+    return wrapper
+
+
+class QueryStats:
+    """
+    Thread-safe in-process latency aggregates of SQL statements grouped by tag.
+    """
+
+    def __init__(self, buckets_ms: tuple[float, ...] = HISTOGRAM_BUCKETS_MS) -> None:
+        self._lock = threading.Lock()
+        self._buckets_ms = buckets_ms
+        self._stats: dict[str, dict] = {}
+
+    def record(self, tag: str, duration_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.get(tag)
+            if stats is None:
+                stats = self._stats[tag] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "histogram": [0] * (len(self._buckets_ms) + 1),
+                }
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["histogram"][bisect.bisect_left(self._buckets_ms, duration_ms)] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> list[dict]:
+        """
+        Returns aggregates per tag sorted by total time spent, slowest first.
+        """
+        labels = [f"<={bound:g}ms" for bound in self._buckets_ms]
+        labels.append(f">{self._buckets_ms[-1]:g}ms")
+
+        with self._lock:
+            result = [
+                {
+                    "tag": tag,
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "histogram": dict(zip(labels, stats["histogram"])),
+                }
+                for tag, stats in self._stats.items()
+            ]
+        return sorted(result, key=lambda item: item["total_ms"], reverse=True)
+
+
+def instrument_engine(
+    engine: Engine, stats: QueryStats, slow_query_threshold_ms: float,
+) -> None:
+    """
+    Registers cursor execution hooks that time every statement of the engine,
+    record it in ``stats`` and log statements slower than the threshold.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info["query_start_time"].pop()
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        tag = current_query_tag.get() or UNTAGGED_QUERY
+
+        stats.record(tag, duration_ms)
+        if duration_ms >= slow_query_threshold_ms:
+            logger.warning(
+                f"Database: Slow query {tag} took {duration_ms:.1f}ms:\n{statement[:1000]}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute не вызывается при ошибке запроса
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
@@ -0,0 +1,42 @@
+import base64
+import datetime
+import json
+import uuid
+
+from sqlalchemy import ColumnElement, tuple_
+
+from .exceptions import InvalidCursor
+
+
+def encode_cursor(created_at: datetime.datetime, _id: uuid.UUID) -> str:
+    """
+    Encodes the keyset position of a row into an opaque url-safe cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), str(_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """
+    Decodes a cursor created by ``encode_cursor``.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, _id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(_id)
+    except (ValueError, TypeError) as exp:
+        raise InvalidCursor(f"Invalid cursor: {cursor}", details=str(exp))
+
+
+def keyset_after(
+    created_at_column: ColumnElement, id_column: ColumnElement, cursor: str,
+) -> ColumnElement[bool]:
+    """
+    Builds the ``(created_at, id) > (:created_at, :id)`` condition for the page
+    that follows the cursor. Served by an index on ``(created_at, id)``.
+    """
+    created_at, _id = decode_cursor(cursor)
+    return tuple_(created_at_column, id_column) > tuple_(created_at, _id)
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection
+
+
+class PoolCheckoutStats:
+    """
+    Thread-safe accumulator of connection checkout timings.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.wait_time_total: float = 0.0
+        self.wait_time_max: float = 0.0
+
+    def record(self, wait_time: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            avg = self.wait_time_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(avg * 1000, 3),
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that measures how long each checkout waits for a connection.
+
+    The wait time includes queueing for a free connection, opening a new one
+    when the pool grows into overflow, and the pre-ping round trip.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = PoolCheckoutStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.checkout_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.checkout_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def get_pool_stats(pool: Pool) -> dict:
+    """
+    Collects a snapshot of the connection pool state.
+
+    Args:
+        pool (Pool): Pool of the engine to inspect.
+
+    Returns:
+        dict: Pool class, configured size, current checked-in/checked-out/overflow
+              connections and accumulated checkout wait timings (if available).
+    """
+    stats: dict = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    if isinstance(pool, InstrumentedAsyncAdaptedQueuePool):
+        stats.update(pool.checkout_stats.as_dict())
+
+    return stats
@@ -1,15 +1,30 @@
+import inspect
 import logging
-from typing import TypeVar
+from typing import AsyncIterator, TypeVar
 from abc import ABC, abstractmethod
 
 from pydantic import BaseModel
 
+from .instrumentation import tag_queries
+
 logger = logging.getLogger("my_app")
 
 DTOModelType = TypeVar("DTOModelType", bound=BaseModel)
 
 
 class AbstractSQLAlchemyRepository(ABC):
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+        Attributes SQL statements executed by public repository methods to
+        "<RepositoryClass>.<method>" in query timing stats.
+        """
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_"):
+                continue
+            if inspect.iscoroutinefunction(attr) or inspect.isasyncgenfunction(attr):
+                setattr(cls, name, tag_queries(f"{cls.__name__}.{name}", attr))
+
     @abstractmethod
     async def create(self, data: DTOModelType) -> DTOModelType:
         """Add a new entity to the repository."""
@@ -46,3 +61,23 @@ class AbstractSQLAlchemyRepository(ABC):
     ) -> list[DTOModelType]:
         """List all entities in the repository."""
         pass
+
+    @abstractmethod
+    async def list_page(
+        self, *filter_, cursor: str | None = None, limit: int = 100, **filter_by_,
+    ) -> tuple[list[DTOModelType], str | None]:
+        """
+        List entities ordered by (created_at, id) using keyset pagination.
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        pass
+
+    @abstractmethod
+    def stream_all(
+        self, *filter_, batch_size: int = 1000, **filter_by_,
+    ) -> AsyncIterator[DTOModelType]:
+        """
+        Iterate over all matching entities using a server-side cursor that fetches
+        `batch_size` rows at a time. Must be consumed inside an open unit of work.
+        """
+        pass
@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from .exceptions import AppException
+
+logger = logging.getLogger("my_app")
+
+
+class PasswordHashingOverloaded(AppException):
+    """
+    Raised when too many password hashing operations are already waiting.
+    """
+
+
+class ProcessPoolPasswordHasher:
+    """
+    Runs password hashing and verification in a pool of worker processes,
+    so that CPU-bound bcrypt does not block the event loop.
+
+    At most `max_workers + max_queue_size` operations may be in flight at once,
+    further calls fail fast with `PasswordHashingOverloaded`.
+
+    Hashing cost (bcrypt rounds) is fixed or calibrated with `calibrate()` to
+    a target hashing time; `verify_and_update()` returns a new hash for hashes
+    made with outdated rounds.
+    """
+
+    def __init__(
+        self,
+        hash_func: Callable[..., str],
+        verify_func: Callable[[str, str], bool],
+        verify_and_update_func: Callable[..., tuple[bool, str | None]],
+        calibrate_func: Callable[[float, int, int], tuple[int, float]],
+        max_workers: int = 2,
+        max_queue_size: int = 64,
+        rounds: int | None = None,
+        max_rounds: int | None = None,
+    ) -> None:
+        self._hash_func = hash_func
+        self._verify_func = verify_func
+        self._verify_and_update_func = verify_and_update_func
+        self._calibrate_func = calibrate_func
+        self._max_workers = max_workers
+        self._max_queue_size = max_queue_size
+        self._executor: ProcessPoolExecutor | None = None
+
+        self._rounds = rounds
+        self._max_rounds = max_rounds
+        self._calibrated_hash_ms: float | None = None
+        self._rehashed = 0
+
+        self._in_flight = 0
+        self._rejected = 0
+        self._timings: dict[str, list[float]] = {
+            # operation: [count, total seconds, max seconds]
+            "hash": [0, 0.0, 0.0],
+            "verify": [0, 0.0, 0.0],
+        }
+
+    @property
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                # fork процесса с запущенным event loop и потоками небезопасен
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        hash_func = functools.partial(self._hash_func, rounds=self._rounds)
+        return await self._run("hash", hash_func, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", self._verify_func, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str,
+    ) -> tuple[bool, str | None]:
+        verify_func = functools.partial(
+            self._verify_and_update_func, rounds=self._rounds, max_rounds=self._max_rounds,
+        )
+        is_valid, new_hash = await self._run("verify", verify_func, password, hashed_password)
+        if new_hash is not None:
+            self._rehashed += 1
+        return is_valid, new_hash
+
+    async def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        """
+        Measures hashing time in a worker process and switches to the rounds
+        closest to ``target_ms``.
+        """
+        loop = asyncio.get_running_loop()
+        rounds, hash_ms = await loop.run_in_executor(
+            self._pool, self._calibrate_func, target_ms, min_rounds, max_rounds,
+        )
+        self._rounds, self._calibrated_hash_ms = rounds, hash_ms
+        self._max_rounds = max(max_rounds, rounds)
+        logger.info(
+            f"Password hashing: Calibrated bcrypt rounds to {rounds} "
+            f"(~{hash_ms:.0f}ms per hash, target {target_ms:.0f}ms)."
+        )
+        return rounds
+
+    async def _run(self, operation: str, func: Callable, *args):
+        if self._in_flight >= self._max_workers + self._max_queue_size:
+            self._rejected += 1
+            raise PasswordHashingOverloaded(
+                "Password hashing queue is full!",
+                details={"in_flight": self._in_flight},
+            )
+
+        self._in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, func, *args,
+            )
+        except BrokenProcessPool:
+            # упавший worker ломает весь пул, следующий вызов создаст новый
+            self._executor = None
+            raise
+        finally:
+            self._in_flight -= 1
+            duration = time.perf_counter() - started_at
+            timings = self._timings[operation]
+            timings[0] += 1
+            timings[1] += duration
+            timings[2] = max(timings[2], duration)
+
+    def stats(self) -> dict:
+        result = {
+            "workers": self._max_workers,
+            "max_queue_size": self._max_queue_size,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self._max_workers, 0),
+            "rejected": self._rejected,
+            "rounds": self._rounds,
+            "calibrated_hash_ms": (
+                round(self._calibrated_hash_ms, 3) if self._calibrated_hash_ms else None
+            ),
+            "rehashed": self._rehashed,
+        }
+        for operation, (count, total, max_duration) in self._timings.items():
+            result[f"{operation}_count"] = count
+            result[f"{operation}_avg_ms"] = round(total / count * 1000, 3) if count else 0.0
+            result[f"{operation}_max_ms"] = round(max_duration * 1000, 3)
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,133 @@
+import logging
+import math
+import time
+from typing import AsyncContextManager, Callable
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .exceptions import AppException
+
+logger = logging.getLogger("my_app")
+
+
+class RateLimitExceeded(AppException):
+    """
+    Raised when a caller exceeds one of the rate limits.
+    """
+
+    def __init__(self, message: str, retry_after_seconds: int, details=None) -> None:
+        super().__init__(message, details)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding window log rate limiter on Redis sorted sets.
+
+    All limits of one `hit()` are checked and recorded by a single Lua script,
+    an attempt is recorded only if it is allowed by every limit. Limits passed
+    as ``check_only`` are checked but not recorded, attempts are added to them
+    later with `record()` (e.g. only for failed ones).
+    Redis errors are logged and the attempt is allowed.
+    """
+
+    # KEYS: ключи лимитов
+    # ARGV: now_ms, attempt id, затем limit, window_ms и флаг записи для каждого ключа
+    HIT_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local retry_after = 0
+        for i, key in ipairs(KEYS) do
+            local limit = tonumber(ARGV[i * 3])
+            local window = tonumber(ARGV[1 + i * 3])
+            redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+            if redis.call('ZCARD', key) >= limit then
+                local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+                if oldest[2] then
+                    retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+                else
+                    -- limit <= 0: попыток нет, ждать все окно
+                    retry_after = math.max(retry_after, window)
+                end
+            end
+        end
+        if retry_after > 0 then
+            return retry_after
+        end
+
+        for i, key in ipairs(KEYS) do
+            if ARGV[2 + i * 3] == '1' then
+                redis.call('ZADD', key, now, ARGV[2])
+                redis.call('PEXPIRE', key, ARGV[1 + i * 3])
+            end
+        end
+        return 0
+    """
+
+    def __init__(
+        self,
+        redis_client: Callable[..., AsyncContextManager[Redis]],
+        prefix: str = "rate_limit",
+    ) -> None:
+        self._redis_client = redis_client
+        self._prefix = prefix
+
+    async def hit(
+        self,
+        limits: dict[str, tuple[int, float]],
+        check_only: dict[str, tuple[int, float]] | None = None,
+    ) -> None:
+        """
+        Records an attempt for every key of `limits`.
+
+        Args:
+            limits: Key -> (max attempts, window in seconds).
+            check_only: Limits in the same format that are checked, but the
+                attempt is not recorded for them.
+
+        Raises:
+            RateLimitExceeded: If any of the limits is exhausted.
+        """
+        check_only = check_only or {}
+        keys = [f"{self._prefix}:{key}" for key in (*limits, *check_only)]
+        args = [time.time_ns() // 1_000_000, uuid4().hex]
+        for limit, window_seconds in limits.values():
+            args.extend((limit, int(window_seconds * 1000), 1))
+        for limit, window_seconds in check_only.values():
+            args.extend((limit, int(window_seconds * 1000), 0))
+
+        try:
+            async with self._redis_client() as client:
+                hit = client.register_script(self.HIT_SCRIPT)
+                retry_after_ms = await hit(keys=keys, args=args)
+        except RedisError as exp:
+            logger.warning(f"Rate limiter: Redis error, limits are not applied: {exp}")
+            return
+
+        if retry_after_ms:
+            raise RateLimitExceeded(
+                "Too many attempts!",
+                retry_after_seconds=max(math.ceil(int(retry_after_ms) / 1000), 1),
+                details={"keys": [*limits, *check_only]},
+            )
+
+    async def record(self, limits: dict[str, tuple[int, float]]) -> None:
+        """
+        Records an attempt for every key without checking the limits.
+
+        Args:
+            limits: Key -> (max attempts, window in seconds).
+        """
+        now_ms = time.time_ns() // 1_000_000
+        attempt_id = uuid4().hex
+        try:
+            async with self._redis_client() as client:
+                pipe = client.pipeline(transaction=True)
+                for key, (_, window_seconds) in limits.items():
+                    key = f"{self._prefix}:{key}"
+                    pipe.zadd(key, {attempt_id: now_ms})
+                    pipe.pexpire(key, int(window_seconds * 1000))
+                await pipe.execute()
+        except RedisError as exp:
+            logger.warning(f"Rate limiter: Redis error, attempt is not recorded: {exp}")
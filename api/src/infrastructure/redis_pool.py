@@ -0,0 +1,35 @@
+from redis import BlockingConnectionPool
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+
+
+def get_redis_pool_stats(pool: BlockingConnectionPool | AsyncBlockingConnectionPool) -> dict:
+    """
+    Collects a snapshot of the Redis connection pool state.
+
+    Args:
+        pool: Sync or async blocking connection pool to inspect.
+
+    Returns:
+        dict: Pool kind, URL without password, max connections and
+              current in use / idle connections.
+    """
+    kwargs = pool.connection_kwargs
+    url = f"redis://{kwargs.get('host')}:{kwargs.get('port')}/{kwargs.get('db')}"
+
+    if isinstance(pool, AsyncBlockingConnectionPool):
+        kind = "async"
+        in_use = len(pool._in_use_connections)
+        idle = len(pool._available_connections)
+    else:
+        kind = "sync"
+        # в очереди пула свободные соединения и None на месте еще не созданных
+        idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        in_use = len(pool._connections) - idle
+
+    return {
+        "url": url,
+        "kind": kind,
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "idle": idle,
+    }
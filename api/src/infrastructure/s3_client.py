@@ -1,19 +1,30 @@
 from io import BytesIO
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import aioboto3
+from aiobotocore.config import AioConfig
 import boto3
 from botocore.exceptions import ClientError
 import botocore.config
 
 
 class AsyncS3Client:
+    """
+    Async S3 client.
+
+    After `start()` all calls share one botocore client and its HTTP connection
+    pool until `close()`. Without `start()` a client is created per call.
+    """
+
     def __init__(
         self,
         endpoint_url: str,
         access_key: str,
         secret_key: str,
         bucket_name: str,
+        max_pool_connections: int = 10,
+        keepalive_timeout_seconds: float = 12.0,
+        tcp_keepalive: bool = False,
     ):
         self._config = {
             "service_name": "s3",
@@ -21,13 +32,43 @@ class AsyncS3Client:
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "region_name": "us-east-1",
-            "proxies": {},  # needs when system proxy is used
+            "config": AioConfig(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=tcp_keepalive,
+                connector_args={"keepalive_timeout": keepalive_timeout_seconds},
+                proxies={},  # needs when system proxy is used
+            ),
         }
         self._session = aioboto3.Session()
+        self._exit_stack: AsyncExitStack | None = None
+        self._client = None
         self.bucket_name = bucket_name
 
+    async def start(self) -> None:
+        """
+        Creates the shared client, e.g. on application startup.
+        """
+        if self._client is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(
+            self._session.client(**self._config)
+        )
+
+    async def close(self) -> None:
+        """
+        Closes the shared client and its connections.
+        """
+        if self._exit_stack is None:
+            return
+        client_stack, self._exit_stack, self._client = self._exit_stack, None, None
+        await client_stack.aclose()
+
     @asynccontextmanager
     async def _get_client(self):
+        if self._client is not None:
+            yield self._client
+            return
         async with self._session.client(**self._config) as client:
             yield client
 
@@ -15,6 +15,21 @@ class PostgresSettings(BaseSettings):
 
     url: str = f"postgresql+asyncpg://{username}:{password}@{host}:{port}/{db_name}"
 
+    # при False используется NullPool (новое соединение на каждую сессию)
+    pool_enabled: bool = True
+    pool_size: int = 10
+    pool_max_overflow: int = 10
+    pool_timeout_seconds: float = 30.0
+    pool_recycle_seconds: int = 1800
+    pool_pre_ping: bool = True
+
+    query_stats_enabled: bool = True
+    slow_query_threshold_ms: float = 200.0
+
+    # чтение (uow.execute) идет на реплики по кругу, при недоступности - на primary
+    replica_urls: list[str] = []
+    replica_retry_after_seconds: float = 30.0
+
 
 class RedisSettings(BaseSettings):
     host: str = "redis"
@@ -25,6 +40,11 @@ class RedisSettings(BaseSettings):
     app_url: str = f"redis://{host}:{port}/{app_db_num}"
     broker_url: str = f"redis://{host}:{port}/{celery_broker_num}"
 
+    # общие пулы соединений на каждый url (отдельно для async и sync клиентов)
+    pool_enabled: bool = True
+    pool_max_connections: int = 50
+    pool_timeout_seconds: float = 5.0
+
 
 class S3Settings(BaseSettings):
     host: str = "s3"
@@ -33,6 +53,10 @@ class S3Settings(BaseSettings):
     secret_key: str = "admin"
     bucket_name: str = "test_bucket"
     http_prefix: str = "http"
+    # общий клиент на процесс (AsyncS3Client)
+    max_pool_connections: int = 50
+    keepalive_timeout_seconds: float = 30.0
+    tcp_keepalive: bool = True
 
     @property
     def config_dict(self) -> dict:
@@ -40,18 +64,53 @@ class S3Settings(BaseSettings):
             "endpoint_url": f"{self.http_prefix}://{self.host}:{self.port}",
             "access_key": self.access_key,
             "secret_key": self.secret_key,
-            "bucket_name": self.buket_name,
+            "bucket_name": self.bucket_name,
         }
 
 
 class AuthSettings(BaseSettings):
     jwt_key: str = "test_key"
     jwt_algorithm: str = "HS256"
+    # "jose", "pyjwt" или "hs256" (только HS256)
+    jwt_backend: str = "jose"
+    # проверенные токены в памяти процесса, 0 - без кеша
+    jwt_decode_cache_size: int = 10000
     token_type_filed_name: str = "type"
     access_token_name: str = "access"
     refresh_token_name: str = "refresh"
     access_token_expires_min: int = 15
     refresh_token_expires_min: int = 44640
+    # не проверять epoch access токенов в redis: авторизация без I/O,
+    # но отозванные токены действуют до истечения срока (access_token_expires_min)
+    access_token_revocation_grace_mode: bool = False
+    # кеш текущего пользователя для авторизации по access token
+    auth_user_cache_local_ttl_seconds: float = 5.0
+    auth_user_cache_redis_ttl_seconds: int = 300
+    auth_user_cache_local_max_size: int = 10000
+    password_hashing_workers: int = 2
+    password_hashing_max_queue_size: int = 64
+    # bcrypt rounds подбираются при старте под целевое время хеширования,
+    # 0 - без калибровки, используется password_hash_rounds
+    password_hash_target_ms: float = 250.0
+    password_hash_rounds: int = 12
+    password_hash_min_rounds: int = 10
+    password_hash_max_rounds: int = 16
+    # ограничение попыток входа до проверки пароля (скользящее окно)
+    login_rate_limit_enabled: bool = True
+    login_rate_limit_per_ip: int = 20
+    login_rate_limit_per_login: int = 5
+    login_rate_limit_window_seconds: float = 60.0
+    # crontab (m h dom mon dow), по умолчанию каждое воскресенье в 1:00 UTC
+    expired_tokens_purge_cron: str = "0 1 * * 0"
+    expired_tokens_purge_batch_size: int = 5000
+    expired_tokens_purge_batch_pause_seconds: float = 0.1
+    # "redis" (allowlist в redis с write-behind в postgres) или "postgres"
+    refresh_token_store: str = "redis"
+    # "celery" (периодическая задача celery beat) или "api" (задача в каждом
+    # процессе API, для развертываний с одним процессом)
+    refresh_tokens_write_behind_runner: str = "celery"
+    refresh_tokens_write_behind_interval_seconds: float = 1.0
+    refresh_tokens_write_behind_batch_size: int = 500
 
 
 class EmailClientSettings(BaseSettings):
@@ -69,6 +128,16 @@ class YouTubeSettings(BaseSettings):
     video_duration_constraint: float = 16.0
     api_key: str = "Some API key"
     visitor_info1_live: str = "Some visitor key"
+    operation_ttl_seconds: int = 1800
+    # операции, завершенные без файла
+    operation_failed_ttl_seconds: int = 300
+    operation_events_max_ids: int = 50
+    operation_events_heartbeat_seconds: float = 15.0
+    # ожидание записи операции, которой еще нет, в потоке событий
+    operation_events_unknown_grace_seconds: float = 10.0
+    operation_max_wait_seconds: float = 30.0
+    operation_progress_interval_seconds: float = 1.0
+    operation_progress_stream_maxlen: int = 100
 
 
 class Settings(BaseSettings):
@@ -1,16 +1,24 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 
 from api.src.domain.auth.routers.auth import router as auth_router
 from api.src.domain.users.routers.users import router as users_router
 from api.src.domain.music.routers.youtube_download import router as music_router
+from api.src.domain.monitoring.routers.monitoring import router as monitoring_router
 from api.src.domain.exceptions import HTTPExceptionInternalServerError
+from api.src.domain.auth.token_store import RedisRefreshTokenStore
+from api.src.domain.auth.utils import check_jwt_settings
 from api.src.infrastructure.logger import configure_logger
 from api.src.infrastructure.settings import settings
+from api.src.infrastructure.app import app as app_container
+from api.src.infrastructure.password_hasher import PasswordHashingOverloaded
+from api.src.infrastructure.rate_limiter import RateLimitExceeded
 
 configure_logger()
 logger = logging.getLogger("my_app")
@@ -18,8 +26,35 @@ logger = logging.getLogger("my_app")
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    check_jwt_settings()
+    if settings.auth.password_hash_target_ms:
+        await app_container.password_hasher.calibrate(
+            target_ms=settings.auth.password_hash_target_ms,
+            min_rounds=settings.auth.password_hash_min_rounds,
+            max_rounds=settings.auth.password_hash_max_rounds,
+        )
+    await app_container.async_s3_client.start()
     logger.info("App started!")
+    token_store = app_container.refresh_token_store
+    write_behind = None
+    if (
+        isinstance(token_store, RedisRefreshTokenStore)
+        and settings.auth.refresh_tokens_write_behind_runner == "api"
+    ):
+        write_behind = asyncio.create_task(
+            token_store.run_write_behind(
+                settings.auth.refresh_tokens_write_behind_interval_seconds,
+            )
+        )
     yield
+    if write_behind is not None:
+        write_behind.cancel()
+        with suppress(asyncio.CancelledError):
+            await write_behind
+    if isinstance(token_store, RedisRefreshTokenStore):
+        # сохранение изменений, накопленных с последнего flush
+        await token_store.flush()
+    await app_container.shutdown()
     logger.info("App stopped!")
 
 
@@ -34,6 +69,7 @@ app = FastAPI(
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(music_router)
+app.include_router(monitoring_router)
 
 
 @app.exception_handler(SQLAlchemyError)
@@ -42,5 +78,27 @@ async def sqlalchemy_error_handler(request: Request, exc: SQLAlchemyError):
     raise HTTPExceptionInternalServerError
 
 
+@app.exception_handler(PasswordHashingOverloaded)
+async def password_hashing_overloaded_handler(
+    request: Request, exc: PasswordHashingOverloaded,
+):
+    logger.warning(f"Password hashing overloaded: {exc.details} | {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, try again later!"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    logger.warning(f"Rate limit exceeded: {exc.details} | {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many attempts, try again later!"},
+        headers={"Retry-After": str(exc.retry_after_seconds)},
+    )
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", port=settings.app.port, host=settings.app.host, reload=True)
@@ -8,6 +8,7 @@ from api.src.infrastructure.database.enums import Roles
 from api.src.infrastructure.database.models import Base
 from api.src.domain.users.schemas import UserDTO
 from api.src.domain.auth.utils import get_password_hash
+from api.src.domain.auth.token_store import RedisRefreshTokenStore
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -16,6 +17,8 @@ async def flush_redis():
         await conn.flushdb()
     async with app_container.async_redis_client(settings.redis.broker_url) as conn:
         await conn.flushdb()
+    # соединения event loop сессии не должны попасть в тесты
+    await app_container.close_connection_pools()
 
     yield
 
@@ -23,10 +26,18 @@ async def flush_redis():
         await conn.flushdb()
     async with app_container.async_redis_client(settings.redis.broker_url) as conn:
         await conn.flushdb()
+    await app_container.close_connection_pools()
 
 
 @pytest.fixture(scope="function", autouse=True)
-async def setup_database():
+async def close_connection_pools():
+    # каждый тест выполняется в своем event loop, соединения пулов к нему привязаны
+    yield
+    await app_container.close_connection_pools()
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def setup_database(close_connection_pools):
     async with app_container._sqlalchemy_async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
@@ -34,6 +45,12 @@ async def setup_database():
 
     async with app_container._sqlalchemy_async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # незаписанные изменения refresh токенов ссылаются на удаленных пользователей
+    async with app_container.async_redis_client() as conn:
+        await conn.delete(RedisRefreshTokenStore.JOURNAL_KEY)
+        # все тесты логинятся с одного ip, попытки входа не переносятся между тестами
+        async for key in conn.scan_iter("rate_limit:*"):
+            await conn.delete(key)
 
 
 @pytest.fixture
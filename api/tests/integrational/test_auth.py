@@ -1,21 +1,32 @@
 import asyncio
+import contextvars
+import uuid
 from datetime import datetime, timedelta, timezone
 
+import pytest
 from httpx import AsyncClient
+from jose import JWTError
 
-from api.src.domain.users.schemas import UserDTO
+from api.src.domain.users.schemas import UserDTO, UserUpdateRequest
+from api.src.domain.auth import utils
 from api.src.domain.auth.utils import decode_jwt
-from api.src.domain.auth.schemas import TokenDTO
+from api.src.domain.auth.schemas import TokenDTO, RefreshTokenDTO
 from api.src.infrastructure.app import app
+from api.src.infrastructure.database.enums import Roles
+from api.src.infrastructure.database.exceptions import ConstraintViolation
+from api.src.infrastructure.rate_limiter import RateLimitExceeded
 from api.src.infrastructure.settings import settings
 
 
 async def get_refresh_token(jti: str) -> TokenDTO | None:
+    # refresh токены сохраняются в postgres в фоне
+    await app.refresh_token_store.flush()
     async with app.unit_of_work.execute() as uow:
         return await uow.refresh_tokens.find_by_id(jti)
 
 
 async def get_list_of_tokens(user_id: str) -> list[TokenDTO]:
+    await app.refresh_token_store.flush()
     async with app.unit_of_work.execute() as uow:
         return await uow.refresh_tokens.list_all(user_id=user_id)
 
@@ -49,6 +60,57 @@ class TestLogin:
         refresh_token_id = decode_jwt(result["refresh_token"])["jti"]
         assert await get_refresh_token(refresh_token_id) is not None
 
+    async def test_outdated_password_hash_is_updated_on_login(
+            self, client: AsyncClient, simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.begin() as uow:
+            await uow.users.update(
+                simple_user.id,
+                UserDTO(password=utils.get_password_hash("verysecurepassword123", rounds=4)),
+            )
+
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={
+                "username": simple_user.username,
+                "password": "verysecurepassword123",
+            }
+        )
+        assert response.status_code == 200
+
+        async with app.unit_of_work.execute() as uow:
+            user = await uow.users.find_by_id(simple_user.id)
+        assert user.password.startswith(f"$2b${settings.auth.password_hash_rounds:02d}$")
+        assert utils.verify_password_hash("verysecurepassword123", user.password)
+
+    async def test_login_prefers_exact_case_username(
+            self, client: AsyncClient, simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.begin() as uow:
+            upper_user = await uow.users.create(
+                UserDTO(
+                    username=simple_user.username.upper(),
+                    email="upper" + simple_user.email,
+                    password=utils.get_password_hash("otherpassword123", rounds=4),
+                )
+            )
+
+        for username, password in (
+            (simple_user.username, "verysecurepassword123"),
+            (upper_user.username, "otherpassword123"),
+        ):
+            response = await client.post(
+                "/api/v1/auth/login", data={"username": username, "password": password},
+            )
+            assert response.status_code == 200
+
+    def test_password_hash_rounds_calibration(self):
+        rounds, hash_ms = utils.calibrate_password_hash_rounds(
+            target_ms=10_000, min_rounds=4, max_rounds=6,
+        )
+        assert rounds == 6
+        assert hash_ms > 0
+
     async def test_login_by_email(
             self, client: AsyncClient, simple_user: UserDTO,
     ):
@@ -132,6 +194,68 @@ class TestLogin:
         assert abs(refresh_token_exp_date - refresh_exp_time) < 1.0
 
 
+class TestLoginRateLimit:
+    async def test_too_many_attempts_per_login(
+            self, client: AsyncClient, simple_user: UserDTO,
+    ):
+        for _ in range(settings.auth.login_rate_limit_per_login):
+            response = await client.post(
+                "/api/v1/auth/login",
+                data={"username": simple_user.username, "password": "invalid password"},
+            )
+            assert response.status_code == 401
+
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": simple_user.username.upper(), "password": "verysecurepassword123"},
+        )
+        assert response.status_code == 429
+        assert 0 < int(response.headers["Retry-After"]) <= settings.auth.login_rate_limit_window_seconds
+
+    async def test_successful_logins_are_not_limited_per_login(
+            self, client: AsyncClient, simple_user: UserDTO,
+    ):
+        for _ in range(settings.auth.login_rate_limit_per_login + 1):
+            response = await client.post(
+                "/api/v1/auth/login",
+                data={"username": simple_user.username, "password": "verysecurepassword123"},
+            )
+            assert response.status_code == 200
+
+    async def test_disabled_rate_limit_allows_all_attempts(
+            self, client: AsyncClient, simple_user: UserDTO,
+            monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr(settings.auth, "login_rate_limit_enabled", False)
+        for _ in range(settings.auth.login_rate_limit_per_login + 1):
+            response = await client.post(
+                "/api/v1/auth/login",
+                data={"username": simple_user.username, "password": "invalid password"},
+            )
+            assert response.status_code == 401
+
+    async def test_zero_limit_rejects_all_attempts(self):
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await app.rate_limiter.hit({"zero": (0, 5)})
+        assert exc_info.value.retry_after_seconds == 5
+
+    async def test_too_many_attempts_per_ip(
+            self, client: AsyncClient,
+    ):
+        for i in range(settings.auth.login_rate_limit_per_ip):
+            response = await client.post(
+                "/api/v1/auth/login",
+                data={"username": f"unknown_{i}", "password": "invalid password"},
+            )
+            assert response.status_code == 401
+
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": "unknown", "password": "invalid password"},
+        )
+        assert response.status_code == 429
+
+
 class TestLogout:
     async def test_logout(
             self, user_client: AsyncClient,
@@ -211,6 +335,22 @@ class TestRefreshToken:
         assert old_refresh_in_db is None
         assert new_refresh_in_db is not None
 
+    async def test_concurrent_refresh_with_same_token(
+            self, user_client: AsyncClient,
+    ):
+        old_refresh_token = user_client.cookies.get("refresh_token")
+
+        responses = await asyncio.gather(
+            *[
+                user_client.post(
+                    "/api/v1/auth/refresh-token",
+                    headers={"Authorization": f"Bearer {old_refresh_token}"},
+                )
+                for _ in range(2)
+            ]
+        )
+        assert sorted(response.status_code for response in responses) == [200, 401]
+
     async def test_cant_refresh_with_access_token(
             self, user_client: AsyncClient,
     ):
@@ -225,12 +365,13 @@ class TestRefreshToken:
     async def test_cant_refresh_with_expired_refresh_token(
             self, user_client: AsyncClient, simple_user: UserDTO,
     ):
-        expired_refresh_token = await app.auth_service.create_refresh_token(simple_user.id, expires_in_min=0)
-        decoded_expired_refresh_token = decode_jwt(expired_refresh_token)
+        expired_refresh_token, claims = await app.auth_service.create_refresh_token(
+            simple_user.id, expires_in_min=0,
+        )
         await app.auth_service.save_refresh_token(
             user_id=str(simple_user.id),
-            jti=decoded_expired_refresh_token["jti"],
-            exp_date_stamp=decoded_expired_refresh_token["exp"]
+            jti=claims.jti,
+            exp_date_stamp=claims.exp,
         )
         await asyncio.sleep(2)
 
@@ -253,15 +394,14 @@ class TestRefreshToken:
         )
         assert response.status_code == 403
 
-    async def test_cant_refresh_if_refresh_token_not_in_db(
-            self, user_client: AsyncClient,
+    async def test_cant_refresh_if_refresh_token_not_in_store(
+            self, user_client: AsyncClient, simple_user: UserDTO,
     ):
         old_refresh_token = user_client.cookies.get("refresh_token")
         old_refresh_token_id = decode_jwt(old_refresh_token)["jti"]
 
         token_before = await get_refresh_token(old_refresh_token_id)
-        async with app.unit_of_work.begin() as uow:
-            await uow.refresh_tokens.delete(old_refresh_token_id)
+        await app.refresh_token_store.remove(str(simple_user.id), old_refresh_token_id)
         token_after = await get_refresh_token(old_refresh_token_id)
 
         assert token_before is not None
@@ -371,5 +511,413 @@ class TestTerminateAllSessions:
         assert len(tokens_after) == 0
 
 
+class TestAccessTokenRevocation:
+    async def test_access_token_carries_user_claims(
+            self, client: AsyncClient, admin_user: UserDTO,
+    ):
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": admin_user.username, "password": "verysecurepassword123"},
+        )
+        payload = TokenDTO.model_validate(decode_jwt(response.json()["access_token"]))
+
+        assert payload.sub == str(admin_user.id)
+        assert payload.username == admin_user.username
+        assert payload.role == admin_user.role
+        assert payload.active is True
+        assert payload.epoch == 0
+
+    async def test_deactivated_user_loses_access_immediately(
+            self, user_client: AsyncClient, admin_client: AsyncClient, simple_user: UserDTO,
+    ):
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 200
+
+        response = await admin_client.put(
+            f"/api/v1/users/{simple_user.id}", json={"is_active": False},
+        )
+        assert response.status_code == 204
+
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 401
+
+    async def test_deleted_user_loses_access_immediately(
+            self, user_client: AsyncClient, admin_client: AsyncClient, simple_user: UserDTO,
+    ):
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 200
+
+        response = await admin_client.delete(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 204
+
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 401
+
+    async def test_terminated_sessions_lose_access_immediately(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+    ):
+        response = await user_client.post(
+            f"/api/v1/auth/terminate-all-sessions/{simple_user.id}",
+        )
+        assert response.status_code == 204
+
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 401
+
+    async def test_new_access_token_is_valid_after_revocation(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+    ):
+        await app.auth_service.revoke_access_tokens(str(simple_user.id))
+
+        response = await user_client.post(
+            "/api/v1/auth/refresh-token",
+            headers={"Authorization": f"Bearer {user_client.cookies["refresh_token"]}"},
+        )
+        assert response.status_code == 200
+
+        response = await user_client.get(
+            f"/api/v1/users/{simple_user.id}",
+            headers={"Authorization": f"Bearer {response.json()["access_token"]}"},
+        )
+        assert response.status_code == 200
+
+    async def test_grace_mode_skips_revocation_check(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+            monkeypatch: pytest.MonkeyPatch,
+    ):
+        await app.auth_service.revoke_access_tokens(str(simple_user.id))
+
+        monkeypatch.setattr(settings.auth, "access_token_revocation_grace_mode", True)
+        response = await user_client.get(f"/api/v1/users/{simple_user.id}")
+        assert response.status_code == 200
+
+    async def test_access_token_without_claims_is_rejected_everywhere(
+            self, client: AsyncClient, simple_user: UserDTO,
+    ):
+        # access токен, выпущенный до появления claims
+        token, _ = utils.create_jwt(
+            {"sub": str(simple_user.id)}, settings.auth.access_token_name, 15,
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = await client.get(f"/api/v1/users/{simple_user.id}", headers=headers)
+        assert response.status_code == 401
+        response = await client.post(
+            f"/api/v1/auth/terminate-all-sessions/{simple_user.id}", headers=headers,
+        )
+        assert response.status_code == 401
+
+    async def test_revocation_is_applied_after_commit(
+            self, simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.scope():
+            await app.user_service.update(
+                str(simple_user.id), UserUpdateRequest(is_active=False),
+            )
+            await app.auth_service.revoke_access_tokens(str(simple_user.id))
+            # до коммита токен с новым epoch получил бы старые claims
+            assert await app.auth_service.get_token_epoch(str(simple_user.id)) == 0
+
+        assert await app.auth_service.get_token_epoch(str(simple_user.id)) > 0
+
+
+class TestAuthUserCache:
+    async def test_cache_refilled_before_commit_is_invalidated(
+            self, admin_client: AsyncClient, admin_user: UserDTO, simple_user: UserDTO,
+            monkeypatch: pytest.MonkeyPatch,
+    ):
+        # без проверки epoch доступ определяется только кэшированным пользователем
+        monkeypatch.setattr(settings.auth, "access_token_revocation_grace_mode", True)
+        async with app.unit_of_work.scope():
+            await app.user_service.update(
+                str(admin_user.id), UserUpdateRequest(role=Roles.USER),
+            )
+            # параллельный запрос (вне scope) до коммита кэширует старую роль
+            response = await asyncio.create_task(
+                admin_client.post(
+                    f"/api/v1/auth/terminate-all-sessions/{simple_user.id}",
+                ),
+                context=contextvars.Context(),
+            )
+            assert response.status_code == 204
+
+        # старый access токен бывшего админа
+        response = await admin_client.post(
+            f"/api/v1/auth/terminate-all-sessions/{simple_user.id}",
+        )
+        assert response.status_code == 403
+
+    async def test_deactivated_user_is_not_served_from_cache(
+            self, user_client: AsyncClient, admin_client: AsyncClient, simple_user: UserDTO,
+    ):
+        # кэширует пользователя
+        await app.user_service.get_auth_user(str(simple_user.id))
+
+        response = await admin_client.put(
+            f"/api/v1/users/{simple_user.id}", json={"is_active": False},
+        )
+        assert response.status_code == 204
+
+        user = await app.user_service.get_auth_user(str(simple_user.id))
+        assert user.is_active is False
+
+
+class TestRefreshTokenStore:
+    async def test_oldest_tokens_above_limit_are_removed(
+            self, simple_user: UserDTO,
+    ):
+        time_now = datetime.now(tz=timezone.utc)
+        tokens = [
+            RefreshTokenDTO(
+                jti=uuid.uuid4(),
+                user_id=simple_user.id,
+                expires_at=time_now + timedelta(days=i + 1),
+            )
+            for i in range(3)
+        ]
+        for token in tokens:
+            await app.refresh_token_store.add(token, limit=2)
+
+        user_id = str(simple_user.id)
+        assert not await app.refresh_token_store.exists(user_id, str(tokens[0].jti))
+        assert await app.refresh_token_store.exists(user_id, str(tokens[1].jti))
+        assert await app.refresh_token_store.exists(user_id, str(tokens[2].jti))
+
+        tokens_in_db = await get_list_of_tokens(user_id)
+        assert {token.jti for token in tokens_in_db} == {tokens[1].jti, tokens[2].jti}
+
+    async def test_removed_tokens_are_deleted_from_db(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+    ):
+        assert len(await get_list_of_tokens(str(simple_user.id))) == 1
+
+        await app.refresh_token_store.remove_all(str(simple_user.id))
+
+        assert await get_list_of_tokens(str(simple_user.id)) == []
+
+    async def test_restore_tokens_from_db(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+    ):
+        jti = decode_jwt(user_client.cookies.get("refresh_token"))["jti"]
+        await app.refresh_token_store.flush()
+        async with app.async_redis_client() as client:
+            await client.delete(f"auth:refresh_tokens:{simple_user.id}")
+        assert not await app.refresh_token_store.exists(str(simple_user.id), jti)
+
+        assert await app.refresh_token_store.restore() >= 1
+        assert await app.refresh_token_store.exists(str(simple_user.id), jti)
+
+    async def test_restored_tokens_key_expires_with_last_token(
+            self, user_client: AsyncClient, simple_user: UserDTO,
+    ):
+        key = f"auth:refresh_tokens:{simple_user.id}"
+        exp = decode_jwt(user_client.cookies.get("refresh_token"))["exp"]
+        await app.refresh_token_store.flush()
+        async with app.async_redis_client() as client:
+            await client.delete(key)
+
+        await app.refresh_token_store.restore()
+
+        async with app.async_redis_client() as client:
+            assert await client.expiretime(key) == exp
+
+    async def test_flush_keeps_journal_when_lock_is_lost(
+            self, simple_user: UserDTO, monkeypatch: pytest.MonkeyPatch,
+    ):
+        token_store = app.refresh_token_store
+        await token_store.flush()
+        await token_store.remove_all(str(simple_user.id))
+        persist = token_store._persist
+
+        async def persist_after_lock_expired(entries: list[dict]) -> None:
+            await persist(entries)
+            # блокировка истекла и ее взял другой процесс
+            async with app.async_redis_client() as client:
+                await client.set(token_store.JOURNAL_LOCK_KEY, "other process")
+
+        monkeypatch.setattr(token_store, "_persist", persist_after_lock_expired)
+        try:
+            assert await token_store.flush() == 0
+            async with app.async_redis_client() as client:
+                assert await client.llen(token_store.JOURNAL_KEY) == 1
+        finally:
+            async with app.async_redis_client() as client:
+                await client.delete(token_store.JOURNAL_LOCK_KEY)
+
+
+class TestRefreshTokenBulk:
+    @staticmethod
+    def make_token(user_id: uuid.UUID) -> RefreshTokenDTO:
+        return RefreshTokenDTO(
+            jti=uuid.uuid4(),
+            user_id=user_id,
+            expires_at=datetime.now(tz=timezone.utc) + timedelta(days=1),
+        )
+
+    async def test_create_and_delete_many_tokens(
+            self, simple_user: UserDTO,
+    ):
+        tokens = [self.make_token(simple_user.id) for _ in range(3)]
+        async with app.unit_of_work.begin() as uow:
+            created = await uow.refresh_tokens.create_many(tokens)
+        assert [token.jti for token in created] == [token.jti for token in tokens]
+
+        async with app.unit_of_work.begin() as uow:
+            deleted = await uow.refresh_tokens.delete_many(
+                [token.jti for token in tokens[:2]] + [uuid.uuid4()]
+            )
+        assert deleted == 2
+        user_tokens = await get_list_of_tokens(str(simple_user.id))
+        assert [token.jti for token in user_tokens] == [tokens[2].jti]
+
+    async def test_cant_create_many_tokens_with_existing_jti(
+            self, simple_user: UserDTO,
+    ):
+        token = self.make_token(simple_user.id)
+        async with app.unit_of_work.begin() as uow:
+            await uow.refresh_tokens.create(token)
+
+        with pytest.raises(ConstraintViolation):
+            async with app.unit_of_work.begin() as uow:
+                await uow.refresh_tokens.create_many([token])
+
+
+class TestRotateRefreshToken:
+    @staticmethod
+    def make_token(user_id: uuid.UUID) -> RefreshTokenDTO:
+        return RefreshTokenDTO(
+            jti=uuid.uuid4(),
+            user_id=user_id,
+            expires_at=datetime.now(tz=timezone.utc) + timedelta(days=1),
+        )
+
+    async def test_rotate_replaces_token_and_keeps_limit(
+            self, simple_user: UserDTO,
+    ):
+        tokens = [self.make_token(simple_user.id) for _ in range(3)]
+        for token in tokens:
+            async with app.unit_of_work.begin() as uow:
+                assert await uow.refresh_tokens.rotate(token, limit=3)
+
+        new_token = self.make_token(simple_user.id)
+        async with app.unit_of_work.begin() as uow:
+            assert await uow.refresh_tokens.rotate(
+                new_token, limit=2, old_id=tokens[2].jti,
+            )
+
+        user_tokens = await get_list_of_tokens(str(simple_user.id))
+        assert {token.jti for token in user_tokens} == {tokens[1].jti, new_token.jti}
+
+    async def test_cant_rotate_missing_token(
+            self, simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.begin() as uow:
+            assert not await uow.refresh_tokens.rotate(
+                self.make_token(simple_user.id), limit=5, old_id=uuid.uuid4(),
+            )
+
+        assert await get_list_of_tokens(str(simple_user.id)) == []
+
+
+class TestJWTBackends:
+    @pytest.mark.parametrize("encoder", ["jose", "hs256"])
+    @pytest.mark.parametrize("decoder", ["jose", "hs256"])
+    def test_backends_are_compatible(self, encoder: str, decoder: str):
+        token, claims = utils.create_jwt({"sub": "user"}, "access", 15)
+        encoded = utils.JWT_BACKENDS[encoder]().encode(claims, "key", "HS256")
+
+        assert utils.JWT_BACKENDS[decoder]().decode(encoded, "key", "HS256") == claims
+
+    @pytest.mark.parametrize("backend", ["jose", "hs256"])
+    def test_backends_reject_invalid_tokens(self, backend: str):
+        jwt_backend = utils.JWT_BACKENDS[backend]()
+        token = jwt_backend.encode({"sub": "user"}, "key", "HS256")
+        expired_token = jwt_backend.encode({"sub": "user", "exp": 1}, "key", "HS256")
+
+        for invalid_token in (token[:-2] + "AA", expired_token, "invalid"):
+            with pytest.raises(JWTError):
+                jwt_backend.decode(invalid_token, "key", "HS256")
+        with pytest.raises(JWTError):
+            jwt_backend.decode(token, "other key", "HS256")
+
+    @pytest.mark.parametrize("backend", ["jose", "hs256"])
+    def test_backends_accept_numeric_exp(self, backend: str):
+        jwt_backend = utils.JWT_BACKENDS[backend]()
+        exp = datetime.now(tz=timezone.utc).timestamp() + 60
+
+        for value in (exp, int(exp), str(int(exp))):
+            token = jwt_backend.encode({"sub": "user", "exp": value}, "key", "HS256")
+            assert jwt_backend.decode(token, "key", "HS256")["exp"] == value
+
+    def test_hs256_backend_rejects_bool_exp(self):
+        jwt_backend = utils.HS256JWTBackend()
+        token = jwt_backend.encode({"sub": "user", "exp": True}, "key", "HS256")
+
+        with pytest.raises(JWTError):
+            jwt_backend.decode(token, "key", "HS256")
+
+    def test_hs256_backend_rejects_other_algorithms(self, monkeypatch: pytest.MonkeyPatch):
+        jwt_backend = utils.HS256JWTBackend()
+        token = jwt_backend.encode({"sub": "user"}, "key", "HS256")
+
+        with pytest.raises(JWTError):
+            jwt_backend.decode(token, "key", "HS512")
+        monkeypatch.setattr(settings.auth, "jwt_backend", "hs256")
+        monkeypatch.setattr(settings.auth, "jwt_algorithm", "HS512")
+        with pytest.raises(ValueError):
+            utils.check_jwt_settings()
+
+    def test_create_jwt_returns_claims(self):
+        token, claims = utils.create_jwt({"sub": "user"}, "access", 15)
+
+        assert decode_jwt(token) == claims
+        assert utils.decode_token(token) == TokenDTO.model_validate(claims)
+
+    def test_cached_claims_are_not_shared(self):
+        token, _ = utils.create_jwt({"sub": "user"}, "access", 15)
+        utils.decode_token(token).sub = "changed"
+
+        assert utils.decode_token(token).sub == "user"
+
+    def test_backend_setting_is_read_on_call(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings.auth, "jwt_backend", "hs256")
+
+        assert isinstance(utils.get_jwt_backend(), utils.HS256JWTBackend)
+
+
+class TestDeleteExpiredTokens:
+    async def test_delete_expired_tokens_in_batches(
+            self, simple_user: UserDTO,
+    ):
+        time_now = datetime.now(tz=timezone.utc)
+        async with app.unit_of_work.begin() as uow:
+            await uow.refresh_tokens.create_many(
+                [
+                    RefreshTokenDTO(
+                        jti=uuid.uuid4(),
+                        user_id=simple_user.id,
+                        expires_at=time_now - timedelta(minutes=i + 1),
+                    )
+                    for i in range(5)
+                ]
+            )
+            active_token = await uow.refresh_tokens.create(
+                RefreshTokenDTO(
+                    jti=uuid.uuid4(),
+                    user_id=simple_user.id,
+                    expires_at=time_now + timedelta(days=1),
+                )
+            )
+
+        result = await app.auth_service.delete_expired_refresh_tokens(
+            batch_size=2, batch_pause_seconds=0,
+        )
+        assert result.deleted == 5
+        assert result.batches == 3
+
+        tokens = await get_list_of_tokens(str(simple_user.id))
+        assert [token.jti for token in tokens] == [active_token.jti]
+
+
 # class TestEmailVerification:
 #     ...
\ No newline at end of file
@@ -0,0 +1,69 @@
+import asyncio
+
+from api.src.infrastructure.app import app
+
+
+class TestTwoLevelCache:
+    async def test_concurrent_misses_load_once(self):
+        cache = app.cache("test_single_flight")
+        calls = 0
+
+        async def load() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return {"value": calls}
+
+        await cache.delete("key")
+        results = await asyncio.gather(*(cache.get_or_set("key", load) for _ in range(10)))
+
+        assert calls == 1
+        assert results == [{"value": 1}] * 10
+        assert cache.stats()["coalesced"] == 9
+
+    async def test_waiters_load_again_when_leader_is_cancelled(self):
+        cache = app.cache("test_leader_cancel")
+        calls = 0
+
+        async def load() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.2)
+            return {"value": calls}
+
+        await cache.delete("key")
+        leader = asyncio.create_task(cache.get_or_set("key", load))
+        await asyncio.sleep(0.05)
+        waiters = [asyncio.create_task(cache.get_or_set("key", load)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        leader.cancel()
+
+        assert await asyncio.gather(*waiters) == [{"value": 2}] * 3
+        assert calls == 2
+
+    async def test_value_loaded_during_invalidation_is_not_cached(self):
+        cache = app.cache("test_stale_load")
+
+        async def load() -> dict:
+            await asyncio.sleep(0.2)
+            return {"value": "old"}
+
+        await cache.delete("key")
+        loading = asyncio.create_task(cache.get_or_set("key", load, tags=["group"]))
+        await asyncio.sleep(0.05)
+        await cache.invalidate_tag("group")
+
+        assert await loading == {"value": "old"}
+        assert await cache.get("key") is None
+
+    async def test_invalidate_tag(self):
+        cache = app.cache("test_tags")
+        await cache.set("first", 1, tags=["group"])
+        await cache.set("second", 2, tags=["group"])
+        await cache.set("third", 3)
+
+        await cache.invalidate_tag("group")
+
+        assert await cache.get("first") is None
+        assert await cache.get("second") is None
+        assert await cache.get("third") == 3
@@ -0,0 +1,90 @@
+from httpx import AsyncClient
+
+from api.src.domain.users.schemas import UserDTO
+from api.src.infrastructure.app import app
+from api.src.infrastructure.settings import settings
+
+
+class TestDBPoolStats:
+    async def test_unauthenticated_user_cant_get_db_pool_stats(
+            self, client: AsyncClient,
+    ):
+        response = await client.get("/api/v1/monitoring/db-pool")
+        assert response.status_code == 401
+
+    async def test_user_cant_get_db_pool_stats(
+            self, user_client: AsyncClient,
+    ):
+        response = await user_client.get("/api/v1/monitoring/db-pool")
+        assert response.status_code == 403
+
+    async def test_admin_get_db_pool_stats(
+            self, admin_client: AsyncClient,
+    ):
+        response = await admin_client.get("/api/v1/monitoring/db-pool")
+        assert response.status_code == 200
+        assert response.json()["pool_class"] == "NullPool"
+
+
+class TestQueryStats:
+    async def test_user_cant_get_query_stats(
+            self, user_client: AsyncClient,
+    ):
+        response = await user_client.get("/api/v1/monitoring/queries")
+        assert response.status_code == 403
+
+    async def test_admin_get_query_stats_by_repository_method(
+            self, admin_client: AsyncClient, admin_user: UserDTO,
+    ):
+        response = await admin_client.delete("/api/v1/monitoring/queries")
+        assert response.status_code == 204
+
+        response = await admin_client.get(f"/api/v1/users/{admin_user.id}")
+        assert response.status_code == 200
+
+        response = await admin_client.get("/api/v1/monitoring/queries")
+        assert response.status_code == 200
+
+        stats = {item["tag"]: item for item in response.json()}
+        assert stats["SQLAlchemyUserRepository.find_by_id"]["count"] >= 1
+        assert sum(stats["SQLAlchemyUserRepository.find_by_id"]["histogram"].values()) >= 1
+
+
+class TestRedisPoolStats:
+    async def test_user_cant_get_redis_pool_stats(
+            self, user_client: AsyncClient,
+    ):
+        response = await user_client.get("/api/v1/monitoring/redis-pools")
+        assert response.status_code == 403
+
+    async def test_admin_get_redis_pool_stats(
+            self, admin_client: AsyncClient,
+    ):
+        for _ in range(3):
+            async with app.async_redis_client() as client:
+                await client.ping()
+        response = await admin_client.get("/api/v1/monitoring/redis-pools")
+
+        assert response.status_code == 200
+        [pool] = response.json()
+        assert pool["kind"] == "async"
+        assert pool["max_connections"] == settings.redis.pool_max_connections
+        # соединение переиспользуется между клиентами
+        assert pool["in_use"] + pool["idle"] == 1
+
+
+class TestCacheStats:
+    async def test_user_cant_get_cache_stats(
+            self, user_client: AsyncClient,
+    ):
+        response = await user_client.get("/api/v1/monitoring/caches")
+        assert response.status_code == 403
+
+    async def test_admin_get_cache_stats(
+            self, admin_client: AsyncClient,
+    ):
+        response = await admin_client.get("/api/v1/monitoring/caches")
+        assert response.status_code == 200
+
+        stats = {item["namespace"]: item for item in response.json()}
+        assert stats["auth_user"]["get_count"] >= 1
@@ -0,0 +1,315 @@
+import asyncio
+import datetime
+import json
+from contextlib import contextmanager
+
+import pytest
+from httpx import AsyncClient
+from redis.exceptions import ConnectionError
+
+from api.src.domain.music.operations import OperationRecorder, get_operation_key
+from api.src.domain.music.schemas import OperationStatus
+from api.src.infrastructure.app import app
+from api.src.infrastructure.settings import settings
+
+
+class TestGetOperation:
+    async def test_get_unknown_operation(self, client: AsyncClient):
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "unknown"},
+        )
+        assert response.status_code == 404
+
+    async def test_get_operation_in_progress(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "in-progress")
+        operation.start()
+        operation.set_stage("download")
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "in-progress"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"detail": "File is not ready yet!"}
+
+    async def test_get_completed_operation(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "completed")
+        operation.start()
+        operation.set_stage("upload")
+        operation.complete(
+            title="title", filename="title.mp3", duration="3:25", link="https://link",
+        )
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "completed"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "title": "title",
+            "filename": "title.mp3",
+            "duration": "3:25",
+            "link": "https://link",
+        }
+
+        async with app.async_redis_client() as redis:
+            record = await redis.hgetall(get_operation_key("completed"))
+        assert record["status"] == OperationStatus.COMPLETED
+        assert datetime.datetime.fromisoformat(record["updated_at"])
+
+    async def test_get_too_long_operation(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "too-long")
+        operation.start()
+        operation.set_stage("metadata")
+        operation.too_long(duration="120:00")
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "too-long"},
+        )
+        assert response.status_code == 422
+
+    async def test_get_failed_operation(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "failed")
+        operation.start()
+        operation.fail("Video unavailable")
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "failed"},
+        )
+        assert response.status_code == 500
+
+    async def test_invalid_operation_transition(self):
+        operation = OperationRecorder(app.redis_client, "invalid")
+        operation.start()
+        operation.fail("Video unavailable")
+
+        with pytest.raises(ValueError):
+            operation.set_stage("download")
+
+
+class TestWaitOperation:
+    async def test_wait_for_operation_to_complete(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "waited")
+        operation.start()
+        operation.set_stage("download")
+
+        request = asyncio.create_task(
+            client.get(
+                "/api/v1/youtube/download",
+                params={"operation_id": "waited", "wait": 5},
+            )
+        )
+        await asyncio.sleep(0.5)
+        await asyncio.to_thread(
+            operation.complete,
+            title="title", filename="title.mp3", duration="3:25", link="https://link",
+        )
+        response = await asyncio.wait_for(request, timeout=5)
+
+        assert response.status_code == 200
+        assert response.json()["link"] == "https://link"
+
+    async def test_wait_timeout(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "stuck")
+        operation.start()
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "stuck", "wait": 0.5},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"detail": "File is not ready yet!"}
+
+    async def test_wait_for_unknown_operation_returns_at_once(self, client: AsyncClient):
+        response = await asyncio.wait_for(
+            client.get(
+                "/api/v1/youtube/download", params={"operation_id": "unknown", "wait": 10},
+            ),
+            timeout=2,
+        )
+        assert response.status_code == 404
+
+    async def test_queued_operation_is_known(self, client: AsyncClient):
+        await app.youtube_service.create_operation("queued")
+
+        response = await client.get(
+            "/api/v1/youtube/download", params={"operation_id": "queued", "wait": 0.5},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"detail": "File is not ready yet!"}
+
+    async def test_wait_above_maximum(self, client: AsyncClient):
+        response = await client.get(
+            "/api/v1/youtube/download",
+            params={
+                "operation_id": "stuck",
+                "wait": settings.youtube.operation_max_wait_seconds + 1,
+            },
+        )
+        assert response.status_code == 422
+
+
+class TestOperationProgress:
+    async def test_progress_events_are_throttled(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "progress")
+        operation.start()
+        operation.set_stage("download")
+        for downloaded_bytes in range(0, 1000, 100):
+            operation.progress_hook({
+                "status": "downloading",
+                "downloaded_bytes": downloaded_bytes,
+                "total_bytes_estimate": 1000.5,
+                "speed": 100.0,
+                "eta": 1,
+            })
+        operation.progress_hook({"status": "finished", "downloaded_bytes": 1000})
+        operation.postprocessor_hook({"status": "started", "postprocessor": "ExtractAudio"})
+
+        response = await client.get(
+            "/api/v1/youtube/download/progress", params={"operation_id": "progress"},
+        )
+        assert response.status_code == 200
+        events = response.json()
+        assert [(event["stage"], event["status"]) for event in events] == [
+            ("download", "downloading"),
+            ("download", "finished"),
+            ("postprocess", "started"),
+        ]
+        assert events[0]["total_bytes"] == 1000
+
+        response = await client.get(
+            "/api/v1/youtube/download/progress",
+            params={"operation_id": "progress", "after": events[1]["id"]},
+        )
+        assert [event["status"] for event in response.json()] == ["started"]
+
+    async def test_stream_starts_with_last_progress(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "progress-stream")
+        operation.start()
+        operation.set_stage("download")
+        operation.progress_hook({"status": "finished", "downloaded_bytes": 1000})
+        operation.fail("Video unavailable")
+
+        response = await client.get(
+            "/api/v1/youtube/download/events", params={"operation_id": "progress-stream"},
+        )
+        [event] = parse_events(response.text)
+        assert event["progress"]["status"] == "finished"
+        assert event["progress"]["downloaded_bytes"] == 1000
+
+    async def test_progress_hooks_dont_raise(self):
+        @contextmanager
+        def unavailable_redis_client():
+            raise ConnectionError("Redis is unavailable")
+            yield
+
+        operation = OperationRecorder(unavailable_redis_client, "unreported")
+        operation.progress_hook({"status": "finished", "downloaded_bytes": 1000})
+        operation.postprocessor_hook({"status": "started", "postprocessor": "ExtractAudio"})
+
+        operation = OperationRecorder(app.redis_client, "failed-postprocess")
+        operation.start()
+        operation.fail("Video unavailable")
+        operation.postprocessor_hook({"status": "started", "postprocessor": "ExtractAudio"})
+        assert operation.status == OperationStatus.FAILED
+
+
+def parse_events(body: str) -> list[dict]:
+    return [
+        json.loads(line.removeprefix("data: "))
+        for line in body.splitlines() if line.startswith("data: ")
+    ]
+
+
+class TestOperationEvents:
+    async def test_stream_finished_operations(self, client: AsyncClient):
+        for operation_id in ("first", "second"):
+            operation = OperationRecorder(app.redis_client, operation_id)
+            operation.start()
+            operation.fail("Video unavailable")
+
+        response = await client.get(
+            "/api/v1/youtube/download/events",
+            params={"operation_id": ["first", "second"]},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_events(response.text)
+        assert [event["operation_id"] for event in events] == ["first", "second"]
+        assert all(event["status"] == OperationStatus.FAILED for event in events)
+        # детали ошибки не отдаются клиентам
+        assert all("error" not in event for event in events)
+
+    async def test_stream_published_operation_updates(self, client: AsyncClient):
+        operation = OperationRecorder(app.redis_client, "streamed")
+        operation.start()
+
+        request = asyncio.create_task(
+            client.get(
+                "/api/v1/youtube/download/events", params={"operation_id": "streamed"},
+            )
+        )
+        await asyncio.sleep(0.5)
+        await asyncio.to_thread(operation.set_stage, "download")
+        await asyncio.to_thread(
+            operation.complete,
+            title="title", filename="title.mp3", duration="3:25", link="https://link",
+        )
+        response = await asyncio.wait_for(request, timeout=5)
+
+        events = parse_events(response.text)
+        assert [event["status"] for event in events] == [
+            OperationStatus.PENDING, OperationStatus.PROCESSING, OperationStatus.COMPLETED,
+        ]
+        assert events[-1]["link"] == "https://link"
+
+    async def test_stream_ends_for_unknown_operation(
+            self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr(settings.youtube, "operation_events_unknown_grace_seconds", 0.5)
+        response = await asyncio.wait_for(
+            client.get(
+                "/api/v1/youtube/download/events", params={"operation_id": "unknown"},
+            ),
+            timeout=5,
+        )
+        assert "event: not_found" in response.text
+        assert parse_events(response.text) == [{"operation_id": "unknown"}]
+
+    async def test_streams_dont_hold_app_redis_connections(self, client: AsyncClient):
+        streams = [
+            asyncio.create_task(
+                client.get(
+                    "/api/v1/youtube/download/events",
+                    params={"operation_id": f"waiting-{i}"},
+                )
+            )
+            for i in range(settings.redis.pool_max_connections + 5)
+        ]
+        try:
+            await asyncio.sleep(1)
+            # соединения только на чтение текущего состояния, подписчик на процесс свой
+            assert all(pool["in_use"] == 0 for pool in app.redis_pool_stats())
+        finally:
+            for stream in streams:
+                stream.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+
+    async def test_subscribers_resync_after_listener_restart(self):
+        broker = app.operation_events_broker
+        async with broker.subscribe(["restarted"]) as queue:
+            # задача подписчика завершилась (например, из-за ошибки)
+            broker._task.cancel()
+            await asyncio.gather(broker._task, return_exceptions=True)
+
+            async with broker.subscribe(["other"]):
+                assert await asyncio.wait_for(queue.get(), timeout=5) is None
+
+    async def test_stream_too_many_operations(self, client: AsyncClient):
+        response = await client.get(
+            "/api/v1/youtube/download/events",
+            params={
+                "operation_id": [
+                    str(i) for i in range(settings.youtube.operation_events_max_ids + 1)
+                ],
+            },
+        )
+        assert response.status_code == 422
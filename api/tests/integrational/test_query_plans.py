@@ -0,0 +1,104 @@
+import datetime
+import json
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from api.src.domain.auth.models import SQLAlchemyRefreshTokenModel
+from api.src.domain.auth.schemas import RefreshTokenDTO
+from api.src.domain.users.schemas import UserDTO
+from api.src.infrastructure.app import app
+
+
+@pytest.fixture
+def captured_statements() -> list[tuple[str, tuple]]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    engine = app._sqlalchemy_async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    result = []
+    if plan["Node Type"] == "Seq Scan":
+        result.append(plan["Relation Name"])
+    for sub_plan in plan.get("Plans", []):
+        result.extend(find_seq_scans(sub_plan))
+    return result
+
+
+async def assert_no_seq_scans(statements: list[tuple[str, tuple]]) -> None:
+    assert statements
+
+    async with app._sqlalchemy_async_engine.connect() as conn:
+        # на маленьких таблицах планировщик всегда выбирает seq scan,
+        # с enable_seqscan=off он остается только если нет подходящего индекса
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters,
+            )
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            seq_scans = find_seq_scans(plan[0]["Plan"])
+            assert not seq_scans, f"Sequential scan on {seq_scans}:\n{statement}"
+
+
+async def create_refresh_token(user_id: uuid.UUID) -> RefreshTokenDTO:
+    async with app.unit_of_work.begin() as uow:
+        return await uow.refresh_tokens.create(
+            RefreshTokenDTO(
+                jti=uuid.uuid4(),
+                user_id=user_id,
+                expires_at=datetime.datetime.now(datetime.UTC),
+            )
+        )
+
+
+class TestUserQueryPlans:
+    async def test_login_lookup_uses_index(
+            self, simple_user: UserDTO, captured_statements,
+    ):
+        await app.auth_service.authenticate_user(
+            simple_user.email.upper(), "verysecurepassword123",
+        )
+        await assert_no_seq_scans(captured_statements)
+
+    async def test_user_repository_queries_use_indexes(
+            self, simple_user: UserDTO, other_simple_user: UserDTO, captured_statements,
+    ):
+        async with app.unit_of_work.begin() as uow:
+            await uow.users.find_by_id(simple_user.id)
+            _, cursor = await uow.users.list_page(limit=1)
+            await uow.users.list_page(cursor=cursor, limit=1)
+            await uow.users.update(str(simple_user.id), UserDTO(is_active=False))
+            await uow.users.delete(other_simple_user.id)
+
+        await assert_no_seq_scans(captured_statements)
+
+
+class TestRefreshTokenQueryPlans:
+    async def test_refresh_token_repository_queries_use_indexes(
+            self, simple_user: UserDTO, captured_statements,
+    ):
+        token = await create_refresh_token(simple_user.id)
+
+        async with app.unit_of_work.begin() as uow:
+            await uow.refresh_tokens.find_by_id(token.jti)
+            await uow.refresh_tokens.list_all(user_id=simple_user.id)
+            await uow.refresh_tokens.list_page(user_id=simple_user.id)
+            await uow.refresh_tokens.delete_by(
+                SQLAlchemyRefreshTokenModel.expires_at <= datetime.datetime.now(datetime.UTC)
+            )
+            await uow.refresh_tokens.delete_many([token.jti])
+            await uow.refresh_tokens.delete_by(user_id=simple_user.id)
+
+        await assert_no_seq_scans(captured_statements)
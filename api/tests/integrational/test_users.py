@@ -63,6 +63,72 @@ class TestCreate:
         assert response.status_code == 409
 
 
+class TestList:
+    async def test_user_cant_list_users(
+            self, user_client: AsyncClient,
+    ):
+        response = await user_client.get("/api/v1/users")
+        assert response.status_code == 403
+
+    async def test_admin_list_users_by_pages(
+            self,
+            admin_client: AsyncClient,
+            admin_user: UserDTO,
+            simple_user: UserDTO,
+            other_simple_user: UserDTO,
+    ):
+        user_ids = []
+        cursor = None
+        for _ in range(3):
+            params = {"limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            response = await admin_client.get("/api/v1/users", params=params)
+            assert response.status_code == 200
+
+            result = response.json()
+            assert len(result["items"]) == 1
+            assert result["items"][0].get("password") is None
+            user_ids.append(result["items"][0]["id"])
+            cursor = result["next_cursor"]
+
+        assert cursor is None
+        assert sorted(user_ids) == sorted(
+            str(user.id) for user in (admin_user, simple_user, other_simple_user)
+        )
+
+    async def test_list_users_with_invalid_cursor(
+            self, admin_client: AsyncClient,
+    ):
+        response = await admin_client.get(
+            "/api/v1/users", params={"cursor": "invalid_cursor"},
+        )
+        assert response.status_code == 400
+
+
+class TestStreamAll:
+    async def test_stream_all_users_in_batches(
+            self,
+            admin_user: UserDTO,
+            simple_user: UserDTO,
+            other_simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.execute() as uow:
+            user_ids = [user.id async for user in uow.users.stream_all(batch_size=1)]
+
+        assert sorted(user_ids) == sorted(
+            user.id for user in (admin_user, simple_user, other_simple_user)
+        )
+
+    async def test_stream_all_users_with_filter(
+            self, admin_user: UserDTO, simple_user: UserDTO,
+    ):
+        async with app.unit_of_work.execute() as uow:
+            users = [user async for user in uow.users.stream_all(role=simple_user.role)]
+
+        assert [user.id for user in users] == [simple_user.id]
+
+
 class TestGet:
     async def test_unauthenticated_user_cant_get_user(
             self, client: AsyncClient, simple_user: UserDTO,